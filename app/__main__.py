@@ -1,12 +1,112 @@
+"""
+Usage:
+    python -m app            development server with auto-reload on :3001
+    python -m app serve      production server, one worker per CPU
+
+``serve`` runs gunicorn with uvicorn workers, configured from the SERVER_*
+settings. Gunicorn replaces workers that exit, recycles them after
+SERVER_MAX_REQUESTS requests, and on SIGHUP starts a new set of workers
+before gracefully stopping the old ones; SIGTERM drains them. With
+``--preload`` the app is imported once in the master before forking, which
+saves memory and start time but means SIGHUP cannot pick up new code.
+Without it, each worker imports the app after the fork.
+"""
+
+import argparse
 import os
 import sys
+from importlib.util import find_spec
 
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
+APP = "app.main:app"
+
+
+def available_cpus() -> int:
+    # Honours CPU affinity, e.g. a container pinned to some of the host's cores
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def serve(args: argparse.Namespace) -> None:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    from app.utils.config import settings
+
+    # Resolved before the app is imported: the database pool is sized per
+    # worker from WEB_CONCURRENCY
+    workers = args.workers or int(os.getenv("WEB_CONCURRENCY") or 0)
+    workers = workers or available_cpus()
+    settings.WEB_CONCURRENCY = workers
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+
+    class Worker(UvicornWorker):
+        # "auto" picks uvloop and httptools when they are installed
+        CONFIG_KWARGS = {"loop": "auto", "http": "auto", "server_header": False}
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.config.timeout_graceful_shutdown = settings.SERVER_GRACEFUL_TIMEOUT
+
+    class Application(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{args.host or settings.SERVER_HOST}:"
+                f"{args.port or settings.SERVER_PORT}",
+                "workers": workers,
+                "worker_class": Worker,
+                "preload_app": args.preload or settings.SERVER_PRELOAD,
+                "max_requests": settings.SERVER_MAX_REQUESTS,
+                "max_requests_jitter": settings.SERVER_MAX_REQUESTS_JITTER,
+                "keepalive": settings.SERVER_KEEP_ALIVE,
+                "backlog": settings.SERVER_BACKLOG,
+                # Leave the workers' own graceful shutdown time to finish first
+                "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT + 5,
+                "accesslog": "-",
+                "when_ready": lambda server: server.log.info(
+                    f"Event loop: {'uvloop' if find_spec('uvloop') else 'asyncio'}, "
+                    f"HTTP parser: {'httptools' if find_spec('httptools') else 'h11'}"
+                ),
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+
+            return app
+
+    Application().run()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app")
+    commands = parser.add_subparsers(dest="command")
+    serve_parser = commands.add_parser("serve", help="run the production server")
+    serve_parser.add_argument("--host", help="default: SERVER_HOST")
+    serve_parser.add_argument("--port", type=int, help="default: SERVER_PORT")
+    serve_parser.add_argument(
+        "--workers", type=int, help="default: WEB_CONCURRENCY, else the CPU count"
+    )
+    serve_parser.add_argument(
+        "--preload",
+        action="store_true",
+        help="import the app before forking (default: SERVER_PRELOAD)",
+    )
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args)
+        return
 
-if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("app.main:app", host="127.0.0.1", port=3001, reload=True)
+    uvicorn.run(APP, host="127.0.0.1", port=3001, reload=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,20 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+# Partitions of partitioned tables are managed at runtime (see
+# app/services/jobs/login_attempt_partitions.py), not by autogenerate
+PARTITIONED_TABLES = ("login_attempts",)
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and reflected and compare_to is None:
+        return not any(name.startswith(f"{parent}_") for parent in PARTITIONED_TABLES)
+    if type_ == "index" and reflected and compare_to is None:
+        return not any(
+            object.table.name.startswith(f"{parent}_") for parent in PARTITIONED_TABLES
+        )
+    return True
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -44,6 +58,7 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -51,7 +66,12 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata, compare_type=True)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        compare_type=True,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
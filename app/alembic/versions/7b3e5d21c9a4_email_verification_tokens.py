@@ -0,0 +1,77 @@
+"""Email verification tokens table
+
+Revision ID: 7b3e5d21c9a4
+Revises: 4f2a9c7e1b30
+Create Date: 2026-10-17 10:02:15.406217
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7b3e5d21c9a4"
+down_revision: Union[str, None] = "4f2a9c7e1b30"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "email_verification_tokens",
+        sa.Column("token_hash", sa.String(length=64), nullable=False),
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("token_hash"),
+    )
+    op.create_index(
+        op.f("ix_email_verification_tokens_user_id"),
+        "email_verification_tokens",
+        ["user_id"],
+        unique=False,
+    )
+
+    # Backfill pending tokens from users.user_data, hashed the same way as
+    # app.utils.security.hash_token (hex SHA-256), then drop them from the JSONB
+    op.execute(
+        """
+        INSERT INTO email_verification_tokens (token_hash, user_id, expires_at)
+        SELECT encode(sha256(convert_to(user_data->>'verification_token', 'UTF8')), 'hex'),
+               id,
+               COALESCE((user_data->>'verification_expiry')::timestamptz, now())
+        FROM users
+        WHERE NOT is_user_confirmed
+          AND user_data ? 'verification_token'
+        ON CONFLICT (token_hash) DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        UPDATE users
+        SET user_data = user_data - 'verification_token' - 'verification_expiry'
+        WHERE user_data ?| array['verification_token', 'verification_expiry']
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema.
+
+    Only token hashes were kept, so outstanding verification links cannot be
+    restored into users.user_data; affected users must request a new one.
+    """
+    op.drop_index(
+        op.f("ix_email_verification_tokens_user_id"),
+        table_name="email_verification_tokens",
+    )
+    op.drop_table("email_verification_tokens")
@@ -0,0 +1,45 @@
+"""Refresh token cleanup indexes
+
+Revision ID: a3c81f5e6d20
+Revises: 7b3e5d21c9a4
+Create Date: 2026-10-17 12:40:03.118524
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a3c81f5e6d20"
+down_revision: Union[str, None] = "7b3e5d21c9a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        op.f("ix_refresh_tokens_expires_at"),
+        "refresh_tokens",
+        ["expires_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_refresh_tokens_revoked_created_at",
+        "refresh_tokens",
+        ["created_at"],
+        unique=False,
+        postgresql_where=sa.text("is_revoked IS true"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_refresh_tokens_revoked_created_at",
+        table_name="refresh_tokens",
+        postgresql_where=sa.text("is_revoked IS true"),
+    )
+    op.drop_index(op.f("ix_refresh_tokens_expires_at"), table_name="refresh_tokens")
@@ -0,0 +1,119 @@
+"""Partition login attempts by month
+
+Revision ID: c5d02e9b7f14
+Revises: a3c81f5e6d20
+Create Date: 2026-10-17 13:22:41.905311
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c5d02e9b7f14"
+down_revision: Union[str, None] = "a3c81f5e6d20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Monthly partitions from the oldest existing row (or this month) up to two
+# months ahead; the scheduler keeps creating them from there on
+CREATE_PARTITIONS = """
+DO $$
+DECLARE
+    month date := date_trunc(
+        'month', LEAST(COALESCE((SELECT min(created_at) FROM login_attempts_old), now()), now())
+    )::date;
+BEGIN
+    WHILE month <= (date_trunc('month', now()) + interval '2 months')::date LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF login_attempts FOR VALUES FROM (%L) TO (%L)',
+            'login_attempts_p' || to_char(month, 'YYYYMM'),
+            month,
+            (month + interval '1 month')::date
+        );
+        month := (month + interval '1 month')::date;
+    END LOOP;
+END $$;
+"""
+
+
+def _rename_old_table() -> None:
+    op.rename_table("login_attempts", "login_attempts_old")
+    op.execute("ALTER INDEX login_attempts_pkey RENAME TO login_attempts_old_pkey")
+    op.execute(
+        "ALTER SEQUENCE login_attempts_id_seq RENAME TO login_attempts_old_id_seq"
+    )
+    op.drop_index("ix_login_attempts_id", table_name="login_attempts_old")
+    op.drop_index("ix_login_attempts_user_id", table_name="login_attempts_old")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rename_old_table()
+    op.create_table(
+        "login_attempts",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("user_id", sa.UUID(), nullable=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("success", sa.Boolean(), nullable=False),
+        sa.Column("failure_reason", sa.String(length=32), nullable=True),
+        sa.Column("ip_address", sa.String(), nullable=True),
+        sa.Column("user_agent", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index(
+        op.f("ix_login_attempts_user_id"), "login_attempts", ["user_id"], unique=False
+    )
+    op.execute(
+        "CREATE TABLE login_attempts_default PARTITION OF login_attempts DEFAULT"
+    )
+    op.execute(CREATE_PARTITIONS)
+    op.execute("""
+        INSERT INTO login_attempts (created_at, user_id, success, ip_address, user_agent)
+        SELECT COALESCE(created_at, now()), user_id, COALESCE(success, false),
+               ip_address, user_agent
+        FROM login_attempts_old
+        """)
+    op.drop_table("login_attempts_old")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table("login_attempts", "login_attempts_partitioned")
+    op.execute(
+        "ALTER INDEX login_attempts_pkey RENAME TO login_attempts_partitioned_pkey"
+    )
+    op.execute(
+        "ALTER SEQUENCE login_attempts_id_seq "
+        "RENAME TO login_attempts_partitioned_id_seq"
+    )
+    op.drop_index("ix_login_attempts_user_id", table_name="login_attempts_partitioned")
+    op.create_table(
+        "login_attempts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.UUID(), nullable=True),
+        sa.Column("success", sa.Boolean(), nullable=True),
+        sa.Column("ip_address", sa.String(), nullable=True),
+        sa.Column("user_agent", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_login_attempts_id"), "login_attempts", ["id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_login_attempts_user_id"), "login_attempts", ["user_id"], unique=False
+    )
+    op.execute("""
+        INSERT INTO login_attempts (user_id, success, ip_address, user_agent, created_at)
+        SELECT user_id, success, ip_address, user_agent, created_at
+        FROM login_attempts_partitioned
+        """)
+    # Dropping the parent drops every partition with it
+    op.drop_table("login_attempts_partitioned")
@@ -0,0 +1,71 @@
+"""Refresh token families for rotation
+
+Revision ID: e8f4b3a1d962
+Revises: c5d02e9b7f14
+Create Date: 2026-10-17 14:05:37.270914
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e8f4b3a1d962"
+down_revision: Union[str, None] = "c5d02e9b7f14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("refresh_tokens", sa.Column("family_id", sa.UUID(), nullable=True))
+    op.add_column(
+        "refresh_tokens",
+        sa.Column("revoked_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # Tokens issued before rotation each start their own family
+    op.execute("UPDATE refresh_tokens SET family_id = gen_random_uuid()")
+    op.execute(
+        "UPDATE refresh_tokens SET revoked_at = COALESCE(created_at, now()) "
+        "WHERE is_revoked IS true"
+    )
+    op.alter_column("refresh_tokens", "family_id", nullable=False)
+    op.create_index(
+        op.f("ix_refresh_tokens_family_id"),
+        "refresh_tokens",
+        ["family_id"],
+        unique=False,
+    )
+    op.drop_index(
+        "ix_refresh_tokens_revoked_created_at",
+        table_name="refresh_tokens",
+        postgresql_where=sa.text("is_revoked IS true"),
+    )
+    op.create_index(
+        "ix_refresh_tokens_revoked_at",
+        "refresh_tokens",
+        ["revoked_at"],
+        unique=False,
+        postgresql_where=sa.text("is_revoked IS true"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_refresh_tokens_revoked_at",
+        table_name="refresh_tokens",
+        postgresql_where=sa.text("is_revoked IS true"),
+    )
+    op.create_index(
+        "ix_refresh_tokens_revoked_created_at",
+        "refresh_tokens",
+        ["created_at"],
+        unique=False,
+        postgresql_where=sa.text("is_revoked IS true"),
+    )
+    op.drop_index(op.f("ix_refresh_tokens_family_id"), table_name="refresh_tokens")
+    op.drop_column("refresh_tokens", "revoked_at")
+    op.drop_column("refresh_tokens", "family_id")
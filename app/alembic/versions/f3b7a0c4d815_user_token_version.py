@@ -0,0 +1,31 @@
+"""Per-user token generation counter
+
+Revision ID: f3b7a0c4d815
+Revises: e8f4b3a1d962
+Create Date: 2026-10-17 15:12:44.608213
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3b7a0c4d815"
+down_revision: Union[str, None] = "e8f4b3a1d962"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column("token_version", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "token_version")
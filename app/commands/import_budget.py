@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Usage: python -m app.commands.import_budget [--budget-ms N] [--runs N] [--top N]
+
+Imports ``app.main`` in fresh interpreters under ``-X importtime`` and
+reports the fastest run, the packages that took the most time, and any
+dependency that should only be loaded on first use. Exits with 1 when the
+import is over budget or one of those dependencies was loaded at startup.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+project_root = Path(__file__).parent.parent.parent
+
+MODULE = "app.main"
+
+# Loaded on first use (2FA, tokens, passwords) or only when configured
+LAZY_MODULES = ["qrcode", "PIL", "pyotp", "jose", "passlib", "sentry_sdk"]
+
+
+def measure(module: str) -> Tuple[float, Dict[str, float], List[str]]:
+    """
+    Import ``module`` in a new interpreter; returns its cumulative import time
+    in ms, self time in ms per top-level package and every imported module.
+    """
+    env = {**os.environ, "PYTHONPATH": str(project_root)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=project_root,
+        env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    total_ms = 0.0
+    per_package: Dict[str, float] = defaultdict(float)
+    imported = []
+    for line in result.stderr.splitlines():
+        # import time:  self [us] | cumulative | imported package
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        name = name.strip()
+        imported.append(name)
+        per_package[name.split(".")[0]] += int(self_us) / 1000
+        if name == module:
+            total_ms = int(cumulative_us) / 1000
+    return total_ms, per_package, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check app startup import time")
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    try:
+        # Timings are noisy; the fastest run is the closest to the real cost
+        total_ms, per_package, imported = min(
+            (measure(MODULE) for _ in range(args.runs)), key=lambda run: run[0]
+        )
+    except RuntimeError as e:
+        print(f"❌ Importing {MODULE} failed: {e}")
+        sys.exit(1)
+
+    print(f"Import time of {MODULE}: {total_ms:.1f} ms (budget {args.budget_ms} ms)")
+    print("-" * 50)
+    for package, ms in sorted(per_package.items(), key=lambda item: -item[1])[
+        : args.top
+    ]:
+        print(f"{package:<32} {ms:9.1f} ms")
+    print("-" * 50)
+
+    expected = set(LAZY_MODULES)
+    if os.getenv("SENTRY_DSN"):
+        expected.discard("sentry_sdk")
+    eager = sorted(expected.intersection(imported))
+
+    failed = False
+    if eager:
+        print(f"❌ Imported at startup, should be loaded lazily: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"❌ Over budget by {total_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("✅ Within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import asyncio
+import contextlib
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, List, Optional, Tuple
+
+from fastapi import Request
+
+from app.models import LoginAttempt
+from app.utils.config import settings
+from app.utils.database import async_session
+from app.utils.logging import logging
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+COPY_COLUMNS = (
+    "created_at",
+    "user_id",
+    "email",
+    "success",
+    "failure_reason",
+    "ip_address",
+    "user_agent",
+)
+
+LoginAttemptRecord = Tuple[
+    datetime,
+    Optional[uuid.UUID],
+    Optional[str],
+    bool,
+    Optional[str],
+    Optional[str],
+    Optional[str],
+]
+
+
+class LoginAttemptRecorder:
+    """
+    Buffers login attempts in memory and writes them to ``login_attempts``
+    with a single COPY per batch, so the login path never waits on the audit
+    insert. A flush runs once ``flush_size`` attempts are buffered, every
+    ``flush_interval`` seconds otherwise, and on shutdown. The buffer is a
+    ring of ``max_buffer`` entries: if Postgres is unreachable for long, the
+    oldest attempts are dropped rather than growing memory without bound.
+
+    A batch that fails to write is set aside and retried ahead of newer
+    attempts by the next ``max_retries`` flushes, then dropped, so a row the
+    table rejects (e.g. for a user deleted meanwhile) cannot stall every
+    later flush. Newer attempts keep the whole ring meanwhile.
+    """
+
+    def __init__(
+        self,
+        max_buffer: int = 10000,
+        flush_size: int = 500,
+        flush_interval: float = 2,
+        max_retries: int = 2,
+    ):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._buffer: Deque[LoginAttemptRecord] = deque(maxlen=max_buffer)
+        self._failed: List[LoginAttemptRecord] = []
+        self._retries = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def record(
+        self,
+        email: Optional[str],
+        success: bool,
+        user_id: Optional[uuid.UUID] = None,
+        failure_reason: Optional[str] = None,
+        request: Optional[Request] = None,
+    ) -> None:
+        if len(self._buffer) == self._buffer.maxlen:
+            metrics.counter("login_attempts.dropped").inc()
+        self._buffer.append(
+            (
+                datetime.now(timezone.utc),
+                user_id,
+                email,
+                success,
+                failure_reason,
+                request.client.host if request and request.client else None,
+                request.headers.get("user-agent") if request else None,
+            )
+        )
+        metrics.counter("login_attempts.recorded").inc()
+        if len(self._buffer) >= self.flush_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """
+        Write everything buffered so far; returns the number of rows written.
+        """
+        written = 0
+        if self._failed:
+            records, self._failed = self._failed, []
+            if not await self._write(records):
+                return 0
+            written += len(records)
+        records = [self._buffer.popleft() for _ in range(len(self._buffer))]
+        if records and await self._write(records):
+            written += len(records)
+        return written
+
+    async def _write(self, records: List[LoginAttemptRecord]) -> bool:
+        try:
+            with metrics.histogram("login_attempts.flush_ms").time():
+                async with async_session() as db:
+                    connection = await db.connection()
+                    raw_connection = await connection.get_raw_connection()
+                    await raw_connection.driver_connection.copy_records_to_table(
+                        LoginAttempt.__tablename__,
+                        records=records,
+                        columns=COPY_COLUMNS,
+                    )
+                    await db.commit()
+        except asyncio.CancelledError:
+            # Left for the final flush on shutdown
+            self._failed = records
+            raise
+        except Exception as exc:
+            metrics.counter("login_attempts.flush_failures").inc()
+            if self._retries >= self.max_retries:
+                self._retries = 0
+                metrics.counter("login_attempts.dropped").inc(len(records))
+                logger.error(
+                    f"Login attempt flush failed, dropping {len(records)} "
+                    f"attempts: {exc}"
+                )
+            else:
+                self._retries += 1
+                self._failed = records
+                logger.error(f"Login attempt flush failed: {exc}")
+            return False
+        self._retries = 0
+        metrics.counter("login_attempts.flushed").inc(len(records))
+        return True
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            self._wakeup.clear()
+            await self.flush()
+
+
+login_attempt_recorder = LoginAttemptRecorder(
+    max_buffer=settings.LOGIN_ATTEMPT_BUFFER_SIZE,
+    flush_size=settings.LOGIN_ATTEMPT_FLUSH_SIZE,
+    flush_interval=settings.LOGIN_ATTEMPT_FLUSH_INTERVAL,
+)
@@ -0,0 +1,75 @@
+from typing import Optional
+
+from app.models import User
+from app.utils.cache import TTLCache, _get_cache
+from app.utils.config import settings
+from app.utils.database import mark_recent_write
+from app.utils.logging import logging
+from app.utils.metrics import metrics
+
+from .schema import UserPrincipal
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_KEY_PREFIX = "auth:principal:"
+
+# Entries here can outlive an invalidation issued by another worker by at most
+# USER_PRINCIPAL_LOCAL_TTL seconds, so keep that TTL short.
+_local_principals = TTLCache(
+    maxsize=settings.USER_PRINCIPAL_LOCAL_MAXSIZE,
+    ttl=settings.USER_PRINCIPAL_LOCAL_TTL,
+)
+
+
+def _principal_key(subject: str) -> str:
+    return f"{PRINCIPAL_KEY_PREFIX}{subject}"
+
+
+async def get_cached_principal(subject: str) -> Optional[UserPrincipal]:
+    if principal := _local_principals.get(subject):
+        metrics.counter("user_principal_cache.local_hits").inc()
+        return principal
+
+    try:
+        cached_value = await _get_cache().get(_principal_key(subject))
+    except Exception as e:
+        logger.warning(f"User principal cache unavailable: {e}")
+        cached_value = None
+
+    if cached_value is None:
+        metrics.counter("user_principal_cache.misses").inc()
+        return None
+
+    metrics.counter("user_principal_cache.redis_hits").inc()
+    principal = UserPrincipal.model_validate_json(cached_value)
+    _local_principals.set(subject, principal)
+    return principal
+
+
+async def cache_principal(user: User) -> UserPrincipal:
+    principal = UserPrincipal.model_validate(user)
+    _local_principals.set(principal.email, principal)
+    try:
+        await _get_cache().set(
+            _principal_key(principal.email),
+            principal.model_dump_json(),
+            ttl=settings.USER_PRINCIPAL_CACHE_TTL,
+        )
+    except Exception as e:
+        logger.warning(f"User principal cache unavailable: {e}")
+    return principal
+
+
+async def invalidate_user_principal(subject: str) -> None:
+    """
+    Drop the cached principal for ``subject`` (the user's email). Call after
+    committing any change to a field that ``UserPrincipal`` carries.
+    """
+    _local_principals.delete(subject)
+    metrics.counter("user_principal_cache.invalidations").inc()
+    # The reload that follows must not come from a replica still behind
+    await mark_recent_write(subject)
+    try:
+        await _get_cache().delete(_principal_key(subject))
+    except Exception as e:
+        logger.warning(f"User principal cache unavailable: {e}")
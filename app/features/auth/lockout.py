@@ -0,0 +1,168 @@
+import math
+import time
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+
+from app.utils.cache import TTLCache, _get_cache
+from app.utils.config import settings
+from app.utils.constants import TOO_MANY_LOGIN_ATTEMPTS_ERROR
+from app.utils.logging import logging
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+FAILURES_KEY_PREFIX = "auth:login_failures:"
+LOCK_KEY_PREFIX = "auth:login_lock:"
+
+# Counts a failure and, once past the threshold, locks the key for
+# base * 2^(failures - threshold) seconds (capped) in a single round trip.
+# Returns the lock duration in seconds, 0 while under the threshold.
+RECORD_FAILURE_SCRIPT = """
+local failures = redis.call('INCR', KEYS[1])
+local window = tonumber(ARGV[1])
+if failures == 1 then
+    redis.call('EXPIRE', KEYS[1], window)
+end
+local threshold = tonumber(ARGV[2])
+if failures < threshold then
+    return 0
+end
+local lock = math.ceil(math.min(
+    tonumber(ARGV[3]) * 2 ^ (failures - threshold), tonumber(ARGV[4])
+))
+redis.call('SET', KEYS[2], failures, 'EX', lock)
+if redis.call('TTL', KEYS[1]) < lock then
+    redis.call('EXPIRE', KEYS[1], lock)
+end
+return lock
+"""
+
+
+class LocalLoginLockout:
+    """
+    Process-local stand-in used while Redis is unreachable. Limits then only
+    hold per worker, which still keeps a single worker's bcrypt pool from
+    being drained by one attacker.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        self._failures = TTLCache(maxsize=maxsize, ttl=settings.LOGIN_FAILURE_WINDOW)
+        self._locks = TTLCache(maxsize=maxsize, ttl=settings.LOGIN_LOCKOUT_MAX)
+
+    def retry_after(self, key: str) -> int:
+        locked_until = self._locks.get(key)
+        if locked_until is None:
+            return 0
+        return max(math.ceil(locked_until - time.monotonic()), 0)
+
+    def record_failure(self, key: str, threshold: int) -> int:
+        failures = self._failures.get(key, 0) + 1
+        self._failures.set(key, failures)
+        if failures < threshold:
+            return 0
+        lock = math.ceil(
+            min(
+                settings.LOGIN_LOCKOUT_BASE * 2 ** (failures - threshold),
+                settings.LOGIN_LOCKOUT_MAX,
+            )
+        )
+        self._locks.set(key, time.monotonic() + lock, ttl=lock)
+        return lock
+
+    def reset(self, key: str) -> None:
+        self._failures.delete(key)
+        self._locks.delete(key)
+
+
+_local_lockout = LocalLoginLockout()
+
+
+def _subjects(email: str, request: Optional[Request]) -> dict:
+    """
+    Lockout keys and their thresholds: the account is locked after a few
+    failures, the client IP (credential stuffing across many accounts) after
+    many more.
+    """
+    subjects = {f"account:{email}": settings.LOGIN_ACCOUNT_FAILURE_THRESHOLD}
+    if request is not None and request.client:
+        subjects[f"ip:{request.client.host}"] = settings.LOGIN_IP_FAILURE_THRESHOLD
+    return subjects
+
+
+async def ensure_login_allowed(email: str, request: Optional[Request] = None) -> None:
+    """
+    Reject the attempt with 429 while the account or the client IP is locked
+    out. Runs before the user lookup and the password check, so a blocked
+    attempt costs one Redis round trip and no bcrypt time.
+    """
+    if not settings.LOGIN_LOCKOUT_ENABLED:
+        return
+    keys = list(_subjects(email, request))
+    try:
+        cache = _get_cache()
+        async with cache.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.ttl(cache.build_key(f"{LOCK_KEY_PREFIX}{key}"))
+            retry_after = max(int(ttl) for ttl in await pipe.execute())
+    except Exception as e:
+        logger.warning(f"Login lockout store unavailable, using local state: {e}")
+        retry_after = max(_local_lockout.retry_after(key) for key in keys)
+
+    if retry_after > 0:
+        metrics.counter("login_lockout.rejected").inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=TOO_MANY_LOGIN_ATTEMPTS_ERROR,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+async def record_login_failure(email: str, request: Optional[Request] = None) -> None:
+    if not settings.LOGIN_LOCKOUT_ENABLED:
+        return
+    subjects = _subjects(email, request)
+    try:
+        cache = _get_cache()
+        async with cache.client.pipeline(transaction=False) as pipe:
+            for key, threshold in subjects.items():
+                pipe.eval(
+                    RECORD_FAILURE_SCRIPT,
+                    2,
+                    cache.build_key(f"{FAILURES_KEY_PREFIX}{key}"),
+                    cache.build_key(f"{LOCK_KEY_PREFIX}{key}"),
+                    settings.LOGIN_FAILURE_WINDOW,
+                    threshold,
+                    settings.LOGIN_LOCKOUT_BASE,
+                    settings.LOGIN_LOCKOUT_MAX,
+                )
+            locks = [int(lock) for lock in await pipe.execute()]
+    except Exception as e:
+        logger.warning(f"Login lockout store unavailable, using local state: {e}")
+        locks = [
+            _local_lockout.record_failure(key, threshold)
+            for key, threshold in subjects.items()
+        ]
+
+    if any(locks):
+        metrics.counter("login_lockout.locks").inc()
+
+
+async def reset_login_failures(email: str) -> None:
+    """
+    Forget the account's failures after a successful login. The IP counter is
+    left alone so an attacker cannot clear it by logging into their own
+    account between guesses.
+    """
+    if not settings.LOGIN_LOCKOUT_ENABLED:
+        return
+    key = f"account:{email}"
+    _local_lockout.reset(key)
+    try:
+        cache = _get_cache()
+        await cache.client.delete(
+            cache.build_key(f"{FAILURES_KEY_PREFIX}{key}"),
+            cache.build_key(f"{LOCK_KEY_PREFIX}{key}"),
+        )
+    except Exception as e:
+        logger.warning(f"Login lockout store unavailable: {e}")
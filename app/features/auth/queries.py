@@ -0,0 +1,89 @@
+"""
+Hot auth statements, built once at import time.
+
+Each statement takes its values as bound parameters, so executing it skips
+rebuilding the construct and always hits SQLAlchemy's compiled cache under
+the same key; asyncpg then reuses the prepared statement for the SQL text.
+"""
+
+from datetime import timedelta
+
+from sqlalchemy import DateTime, String, bindparam, false, func, insert, select, update
+
+from app.models import RefreshToken, User
+from app.utils.config import settings
+
+# params: email
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
+# params: user_id
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+
+# params: token_hash
+REFRESH_TOKEN_BY_HASH = select(RefreshToken).where(
+    RefreshToken.token_hash == bindparam("token_hash")
+)
+
+# Parameters of UPDATE and INSERT statements must not be named after a column
+# of the target table: SQLAlchemy would treat them as values to SET.
+
+# Revokes the presented refresh token if it is live, inserts its successor
+# into the same family and returns the owner's email if the owner still
+# exists at the token's generation; no row means the token was not accepted.
+# params: presented_hash, successor_hash, successor_expires_at, owner_email,
+# owner_token_version
+_revoked = (
+    update(RefreshToken)
+    .where(
+        RefreshToken.token_hash == bindparam("presented_hash"),
+        RefreshToken.is_revoked.is_(False),
+        RefreshToken.expires_at > func.now(),
+    )
+    .values(is_revoked=True, revoked_at=func.now())
+    .returning(RefreshToken.user_id, RefreshToken.family_id)
+    .cte("revoked")
+)
+_issued = (
+    insert(RefreshToken)
+    .from_select(
+        ["user_id", "family_id", "token_hash", "expires_at", "is_revoked"],
+        select(
+            _revoked.c.user_id,
+            _revoked.c.family_id,
+            bindparam("successor_hash", type_=String),
+            bindparam("successor_expires_at", type_=DateTime(timezone=True)),
+            false(),
+        ),
+    )
+    .returning(RefreshToken.id)
+    .cte("issued")
+)
+ROTATE_REFRESH_TOKEN = (
+    select(User.email)
+    .join_from(_revoked, User, User.id == _revoked.c.user_id)
+    .where(
+        User.email == bindparam("owner_email"),
+        User.token_version == bindparam("owner_token_version"),
+    )
+    .add_cte(_issued)
+)
+
+# Revokes the live tokens of the family a rotated-out token belongs to, unless
+# it was rotated within the reuse grace period.
+# params: reused_hash
+_reused_family = (
+    select(RefreshToken.family_id)
+    .where(
+        RefreshToken.token_hash == bindparam("reused_hash"),
+        RefreshToken.is_revoked.is_(True),
+        RefreshToken.revoked_at
+        < func.now() - timedelta(seconds=settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS),
+    )
+    .scalar_subquery()
+)
+REVOKE_REUSED_TOKEN_FAMILY = (
+    update(RefreshToken)
+    .where(RefreshToken.family_id == _reused_family, RefreshToken.is_revoked.is_(False))
+    .values(is_revoked=True, revoked_at=func.now())
+    .execution_options(synchronize_session=False)
+)
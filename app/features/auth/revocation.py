@@ -0,0 +1,191 @@
+import asyncio
+import contextlib
+import hashlib
+import math
+import time
+from typing import Optional
+
+from app.utils.cache import _get_cache
+from app.utils.config import settings
+from app.utils.logging import logging
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+REVOKED_KEY_PREFIX = "auth:revoked_jti:"
+REVOKED_LOG_KEY = "auth:revoked_jti_log"
+
+# Marks the jti revoked until the token's own expiry and appends it to the
+# log every worker syncs from, scored with the Redis clock (milliseconds) so
+# all workers agree on the order. Log entries older than the longest access
+# token lifetime can no longer match a valid token and are pruned here.
+REVOKE_SCRIPT = """
+redis.call('SET', KEYS[1], '1', 'EX', ARGV[2])
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+redis.call('ZADD', KEYS[2], now_ms, ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now_ms - tonumber(ARGV[3]) * 1000)
+return now_ms
+"""
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings: no false negatives, false positives
+    at roughly ``error_rate`` once ``capacity`` items have been added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(
+            math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2), 8
+        )
+        self.hash_count = max(round(self.size / capacity * math.log(2)), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Kirsch-Mitzenmacher: two 64-bit hashes stand in for k independent ones
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class RevokedTokenFilter:
+    """
+    Per-process mirror of the revoked-JTI set kept in Redis. Every request
+    tests its token's jti against a local Bloom filter; only a possible hit
+    costs a Redis round trip to rule out a false positive. A background task
+    pulls new revocations from the Redis log every ``sync_interval`` seconds,
+    so a token revoked on another worker is rejected here within that delay;
+    the worker that revokes a token adds it to its own filter immediately.
+
+    Bloom filters cannot forget, so the filter is rebuilt from the (pruned)
+    log once the revocation window has rolled over or it has grown past
+    ``capacity``.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 100000,
+        error_rate: float = 0.001,
+        sync_interval: float = 1,
+        retention: float = 1800,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.retention = retention
+        self._filter = BloomFilter(capacity, error_rate)
+        self._cursor = 0
+        self._rebuilt_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        """
+        Revoke ``jti`` until ``expires_at`` (the token's ``exp``, epoch seconds).
+        """
+        ttl = math.ceil(expires_at - time.time())
+        if ttl <= 0:
+            return
+        self._filter.add(jti)
+        cache = _get_cache()
+        await cache.client.eval(
+            REVOKE_SCRIPT,
+            2,
+            cache.build_key(f"{REVOKED_KEY_PREFIX}{jti}"),
+            cache.build_key(REVOKED_LOG_KEY),
+            jti,
+            ttl,
+            math.ceil(self.retention),
+        )
+        metrics.counter("revoked_tokens.revoked").inc()
+
+    async def is_revoked(self, jti: str) -> bool:
+        if jti not in self._filter:
+            return False
+        metrics.counter("revoked_tokens.filter_hits").inc()
+        try:
+            cache = _get_cache()
+            revoked = await cache.client.exists(
+                cache.build_key(f"{REVOKED_KEY_PREFIX}{jti}")
+            )
+        except Exception as e:
+            # The filter says the token was most likely revoked; fail closed
+            logger.warning(f"Revoked token store unavailable: {e}")
+            return True
+        if not revoked:
+            metrics.counter("revoked_tokens.false_positives").inc()
+        return bool(revoked)
+
+    async def sync(self) -> int:
+        """
+        Add revocations logged since the last sync; returns how many were read.
+        """
+        rebuild = (
+            time.monotonic() - self._rebuilt_at > self.retention
+            or self._filter.count > self.capacity
+        )
+        cache = _get_cache()
+        # Inclusive lower bound: entries sharing the cursor's millisecond may
+        # have landed after the last read, and re-adding is harmless
+        entries = await cache.client.zrangebyscore(
+            cache.build_key(REVOKED_LOG_KEY),
+            "-inf" if rebuild else self._cursor,
+            "+inf",
+            withscores=True,
+        )
+        target = BloomFilter(self.capacity, self.error_rate) if rebuild else None
+        for jti, score in entries:
+            (target or self._filter).add(
+                jti.decode() if isinstance(jti, bytes) else jti
+            )
+            self._cursor = max(self._cursor, int(score))
+        if target is not None:
+            self._filter = target
+            self._rebuilt_at = time.monotonic()
+            metrics.counter("revoked_tokens.filter_rebuilds").inc()
+        metrics.gauge("revoked_tokens.filter_size").set(self._filter.count)
+        return len(entries)
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning(f"Revoked token sync failed: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+
+revoked_tokens = RevokedTokenFilter(
+    capacity=settings.REVOKED_TOKEN_FILTER_CAPACITY,
+    error_rate=settings.REVOKED_TOKEN_FILTER_ERROR_RATE,
+    sync_interval=settings.REVOKED_TOKEN_SYNC_INTERVAL,
+    # Password reset tokens are access tokens living 30 minutes
+    retention=max(settings.ACCESS_TOKEN_EXPIRE_MINUTES, 30) * 60,
+)
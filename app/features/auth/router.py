@@ -14,8 +14,9 @@ from app.services.email import send_password_reset_email
 from app.utils.config import settings
 from app.utils.dependencies import CurrentUser, DbSession
 from app.utils.rate_limiter import limiter
-from app.utils.response import StandardResponse, success_response
+from app.utils.response import StandardResponse, fast_success_response
 from app.utils.security import (
+    delete_auth_cookies,
     get_token_from_cookies,
     set_auth_cookies,
 )
@@ -38,11 +39,12 @@ from .service import (
     logout_user_session,
     refresh_access_token,
     reset_password_service,
+    revoke_all_sessions,
     setup_2fa,
     verify_2fa,
     verify_email_service,
-    verify_password_reset_service,
 )
+from .twofa import QRCodeFormat
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -57,7 +59,7 @@ async def verify_email(
     token: str = Query(..., description="Email verification token"),
 ):
     message = await verify_email_service(db, token)
-    return success_response(
+    return fast_success_response(
         data={"message": message},
     )
 
@@ -70,8 +72,8 @@ async def verify_email(
 )
 @limiter.limit("10/minute")
 async def login(request: Request, db: DbSession, form_data: LoginRequestSchema):
-    response = await login_service(db, form_data)
-    return success_response(
+    response = await login_service(db, form_data, request)
+    return fast_success_response(
         data=TokenResponseSchema(
             access_token=response.access_token,
             refresh_token=response.refresh_token,
@@ -90,7 +92,7 @@ async def login_with_cookies(
     db: DbSession,
     form_data: LoginRequestSchema,
 ):
-    token_data = await login_service(db, form_data)
+    token_data = await login_service(db, form_data, request)
     set_auth_cookies(response, token_data.access_token, token_data.refresh_token)
     return CookieTokenResponseSchema(message="Login successful")
 
@@ -117,19 +119,29 @@ async def refresh_token(
             detail="Refresh token is required",
         )
 
-    new_access_token = await refresh_access_token(db, refresh_token)
+    new_access_token, new_refresh_token = await refresh_access_token(db, refresh_token)
     if get_token_from_cookies(request, "refresh_token"):
-        set_auth_cookies(response, new_access_token, refresh_token)
+        set_auth_cookies(response, new_access_token, new_refresh_token)
+        data = RefreshTokenResponseSchema(access_token=new_access_token)
+    else:
+        data = RefreshTokenResponseSchema(
+            access_token=new_access_token, refresh_token=new_refresh_token
+        )
 
-    return success_response(
-        data=RefreshTokenResponseSchema(access_token=new_access_token)
-    )
+    return fast_success_response(data=data, response=response)
 
 
 @router.post("/logout", response_model=StandardResponse)
 async def logout(request: Request, response: Response, db: DbSession):
     await logout_user_session(request, response, db)
-    return success_response(data=LogoutResponseSchema())
+    return fast_success_response(data=LogoutResponseSchema(), response=response)
+
+
+@router.post("/logout-all", response_model=StandardResponse)
+async def logout_all(current_user: CurrentUser, response: Response, db: DbSession):
+    await revoke_all_sessions(db, current_user.id, current_user.email)
+    delete_auth_cookies(response)
+    return fast_success_response(data=LogoutResponseSchema(), response=response)
 
 
 @router.post(
@@ -154,7 +166,7 @@ async def register(
     data = {
         "message": "User registered successfully. Please check your email to verify your account."
     }
-    return success_response(data=data)
+    return fast_success_response(data=data, status_code=status.HTTP_201_CREATED)
 
 
 @router.get(
@@ -167,12 +179,12 @@ async def verification_status(current_user: CurrentUser):
         "is_verified": current_user.is_user_confirmed,
         "verification_required": settings.USER_VERIFICATION_CHECK,
     }
-    return success_response(data=data)
+    return fast_success_response(data=data)
 
 
 @router.get("/me", response_model=StandardResponse, status_code=status.HTTP_200_OK)
 async def get_current_user(current_user: CurrentUser):
-    return success_response(data=UserResponseSchema(**current_user.__dict__))
+    return fast_success_response(data=UserResponseSchema.model_validate(current_user))
 
 
 @router.get(
@@ -193,7 +205,7 @@ async def test_password_reset_email(background_tasks: BackgroundTasks):
         reset_link=reset_link,
     )
 
-    return success_response(
+    return fast_success_response(
         data={
             "message": f"Test password reset email sent to {email}",
             "reset_link": reset_link,
@@ -223,7 +235,7 @@ async def create_password_reset_token(
             reset_link=reset_link,
         )
 
-    return success_response(
+    return fast_success_response(
         data={
             "message": "If an account with that email exists, a password reset link has been sent to your email."
         }
@@ -234,19 +246,12 @@ async def create_password_reset_token(
 async def reset_password(
     request: Request, db: DbSession, data: ResetPasswordVerifySchema
 ):
-    user = await verify_password_reset_service(db, data.token)
-    if not user:
+    if not await reset_password_service(db, data.token, data.new_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired token",
         )
-    success = await reset_password_service(db, data.token, data.new_password)
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to reset password",
-        )
-    return success_response(
+    return fast_success_response(
         data={
             "message": "Password reset successful. You can now log in with your new password."
         }
@@ -260,16 +265,26 @@ async def setup_twofa(
     request: Request,
     db: DbSession,
     current_user: CurrentUser,
+    qr_format: QRCodeFormat = Query(
+        QRCodeFormat.PNG,
+        alias="format",
+        description="QR code as a PNG or SVG data URL, or uri for none",
+    ),
 ):
     if not current_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authenticated"
         )
 
-    secret, qr_code = await setup_2fa(db, current_user)
+    secret, otp_uri, qr_code = await setup_2fa(db, current_user, qr_format)
 
-    return success_response(
-        data={"message": "2FA setup successful", "secret": secret, "qr_code": qr_code}
+    return fast_success_response(
+        data={
+            "message": "2FA setup successful",
+            "secret": secret,
+            "otp_uri": otp_uri,
+            "qr_code": qr_code,
+        }
     )
 
 
@@ -291,4 +306,4 @@ async def verify_twofa(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid 2FA token"
         )
 
-    return success_response(data={"message": "2FA verification successful"})
+    return fast_success_response(data={"message": "2FA verification successful"})
@@ -34,6 +34,26 @@ class UserResponseSchema(UserBaseSchema):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UserPrincipal(BaseModel):
+    """
+    Compact snapshot of the authenticated user, cached per token subject.
+    Sensitive columns (password hash, 2FA secret) are deliberately left out.
+    """
+
+    id: uuid.UUID
+    first_name: str
+    last_name: str
+    email: EmailStr
+    is_active: bool
+    is_user_confirmed: bool
+    twofa_enabled: bool
+    token_version: int = 0
+    created_at: datetime
+    user_data: Optional[dict] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class TokenResponseSchema(BaseModel):
     access_token: str
     refresh_token: Optional[str] = None
@@ -52,6 +72,8 @@ class RefreshTokenRequestSchema(BaseModel):
 
 class RefreshTokenResponseSchema(BaseModel):
     access_token: str
+    # Rotated refresh token; omitted when it is delivered as a cookie
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
 
 
@@ -1,20 +1,15 @@
-import base64
-import hashlib
-import io
 import secrets
 import uuid
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Tuple, Union
+from typing import Optional, Tuple
 
-import pyotp
-import qrcode
 from fastapi import BackgroundTasks, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import JSON, cast
+from sqlalchemy import delete, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.models import RefreshToken, User
+from app.models import EmailVerificationToken, RefreshToken, User
 from app.services.email import AccountExistsEmail, VerificationEmail
 from app.utils.config import settings
 from app.utils.constants import (
@@ -24,31 +19,54 @@ from app.utils.constants import (
     EMAIL_VERIFICATION_REQUIRED_ERROR,
     EMAIL_VERIFIED_SUCCESS,
     INVALID_VERIFICATION_TOKEN_ERROR,
+    SESSION_REVOKED_ERROR,
     TOKEN_TYPE_BEARER,
     TWOFA_REQUIRED_ERROR,
     USER_NOT_FOUND_ERROR,
     VERIFICATION_TOKEN_EXPIRED_ERROR,
 )
+from app.utils.database import mark_recent_write
 from app.utils.logging import logging
+from app.utils.metrics import metrics
+from app.utils.password_hasher import HashPriority, password_hasher
 from app.utils.security import (
     create_access_token,
     create_refresh_token,
     delete_auth_cookies,
     get_token_from_cookies,
-    hash_password,
     hash_token,
     verify_access_token,
-    verify_password,
     verify_refresh_token,
 )
 
-from .schema import LoginRequestSchema, TokenResponseSchema, UserCreateSchema
+from .audit import login_attempt_recorder
+from .cache import cache_principal, get_cached_principal, invalidate_user_principal
+from .lockout import (
+    ensure_login_allowed,
+    record_login_failure,
+    reset_login_failures,
+)
+from .queries import (
+    REFRESH_TOKEN_BY_HASH,
+    REVOKE_REUSED_TOKEN_FAMILY,
+    ROTATE_REFRESH_TOKEN,
+    USER_BY_EMAIL,
+    USER_BY_ID,
+)
+from .revocation import revoked_tokens
+from .schema import (
+    LoginRequestSchema,
+    TokenResponseSchema,
+    UserCreateSchema,
+    UserPrincipal,
+)
+from .twofa import QRCodeFormat, qr_codes
 
 logger = logging.getLogger(__name__)
 
 
 async def get_user_by_id(db: AsyncSession, user_id: uuid.UUID) -> Optional[User]:
-    result = await db.execute(select(User).filter(User.id == user_id))
+    result = await db.execute(USER_BY_ID, {"user_id": user_id})
 
     if user := result.scalars().first():
         return user
@@ -58,7 +76,7 @@ async def get_user_by_id(db: AsyncSession, user_id: uuid.UUID) -> Optional[User]
 
 
 async def find_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
-    result = await db.execute(select(User).filter(User.email == email))
+    result = await db.execute(USER_BY_EMAIL, {"email": email})
     user = result.scalar_one_or_none()
     return user or None
 
@@ -72,19 +90,30 @@ async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     return user
 
 
-async def authenticate_user(
-    db: AsyncSession, email: str, password: str
-) -> Union[User, bool]:
-    user = await find_user_by_email(db, email)
-    if not user or not verify_password(password, user.password_hash):
-        return False
-    return user
-
-
 def generate_verification_token() -> str:
     return secrets.token_urlsafe(32)
 
 
+async def issue_verification_token(db: AsyncSession, user_id: uuid.UUID) -> str:
+    """
+    Replace any outstanding verification token of the user with a new one.
+    Only its hash is stored; the raw token is returned for the email link.
+    """
+    verification_token = generate_verification_token()
+    await db.execute(
+        delete(EmailVerificationToken).where(EmailVerificationToken.user_id == user_id)
+    )
+    db.add(
+        EmailVerificationToken(
+            token_hash=hash_token(verification_token),
+            user_id=user_id,
+            expires_at=datetime.now(timezone.utc)
+            + timedelta(minutes=settings.USER_VERIFICATION_EXPIRE_MINUTES),
+        )
+    )
+    return verification_token
+
+
 async def create_user_service(
     db: AsyncSession, user_input: UserCreateSchema, background_tasks: BackgroundTasks
 ) -> User:
@@ -93,28 +122,19 @@ async def create_user_service(
 
     if existing_user:
         if settings.USER_VERIFICATION_CHECK and not existing_user.is_user_confirmed:
-            verification_token = generate_verification_token()
-            expiration_time = datetime.now(timezone.utc) + timedelta(
-                minutes=settings.USER_VERIFICATION_EXPIRE_MINUTES
-            )
-            if not existing_user.user_data:
-                existing_user.user_data = {}
-
-            existing_user.user_data["verification_token"] = verification_token
-            existing_user.user_data["verification_expiry"] = expiration_time.isoformat()
-            await db.commit()
-            await db.refresh(existing_user)
-
+            verification_token = await issue_verification_token(db, existing_user.id)
             verification_url = (
                 f"{settings.FRONTEND_URL}/auth/verify?token={verification_token}"
             )
             email = VerificationEmail()
-            background_tasks.add_task(
-                email.send,
+            await email.send(
                 email_to=existing_user.email,
+                background_tasks=background_tasks,
+                db=db,
                 first_name=existing_user.first_name,
                 verification_link=verification_url,
             )
+            await db.commit()
             return existing_user
         else:
             _, token = await create_password_reset_token_service(
@@ -125,9 +145,9 @@ async def create_user_service(
                 reset_link = f"{frontend_url}/auth/reset-password?token={token}"
 
                 email = AccountExistsEmail()
-                background_tasks.add_task(
-                    email.send,
+                await email.send(
                     email_to=existing_user.email,
+                    background_tasks=background_tasks,
                     first_name=existing_user.first_name,
                     reset_password_url=reset_link,
                     login_link=f"{frontend_url}/auth/login",
@@ -142,48 +162,64 @@ async def create_user_service(
         "last_name": user_input.last_name.strip().title(),
         "email": normalized_email,
         "is_active": True,
-        "password_hash": hash_password(user_input.password),
+        "password_hash": await password_hasher.hash(
+            user_input.password, priority=HashPriority.REGISTRATION
+        ),
         "is_user_confirmed": not settings.USER_VERIFICATION_CHECK,
         "user_data": {},
     }
 
+    db_user = User(id=uuid.uuid4(), **user_data)
+    db.add(db_user)
+
     if settings.USER_VERIFICATION_CHECK:
-        verification_token = generate_verification_token()
-        expiration_time = datetime.now(timezone.utc) + timedelta(
-            minutes=settings.USER_VERIFICATION_EXPIRE_MINUTES
-        )
-        user_data["user_data"] = {
-            "verification_token": verification_token,
-            "verification_expiry": expiration_time.isoformat(),
-            "verified": False,
-        }
+        verification_token = await issue_verification_token(db, db_user.id)
         verification_url = (
             f"{settings.FRONTEND_URL}/auth/verify?token={verification_token}"
         )
         email = VerificationEmail()
-        background_tasks.add_task(
-            email.send,
+        await email.send(
             email_to=normalized_email,
+            background_tasks=background_tasks,
+            db=db,
             first_name=user_input.first_name.strip().title(),
             verification_link=verification_url,
         )
 
-    db_user = User(**user_data)
-    db.add(db_user)
     await db.commit()
-    await db.refresh(db_user)
+    # Their first authenticated reads must find the new row
+    await mark_recent_write(normalized_email)
     return db_user
 
 
 async def login_service(
-    db: AsyncSession, user_input: LoginRequestSchema
+    db: AsyncSession, user_input: LoginRequestSchema, request: Optional[Request] = None
 ) -> TokenResponseSchema:
     normalized_email = user_input.email.strip().lower()
 
-    user = await authenticate_user(
-        db, email=normalized_email, password=user_input.password
-    )
-    if not user:
+    try:
+        await ensure_login_allowed(normalized_email, request)
+    except HTTPException:
+        login_attempt_recorder.record(
+            normalized_email,
+            success=False,
+            failure_reason="locked_out",
+            request=request,
+        )
+        raise
+
+    user = await find_user_by_email(db, normalized_email)
+    if not user or not await password_hasher.verify(
+        user_input.password, user.password_hash, priority=HashPriority.LOGIN
+    ):
+        await record_login_failure(normalized_email, request)
+        login_attempt_recorder.record(
+            normalized_email,
+            success=False,
+            user_id=user.id if user else None,
+            failure_reason="invalid_credentials",
+            request=request,
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
@@ -191,6 +227,13 @@ async def login_service(
         )
 
     if settings.USER_VERIFICATION_CHECK and not user.is_user_confirmed:
+        login_attempt_recorder.record(
+            normalized_email,
+            success=False,
+            user_id=user.id,
+            failure_reason="email_unverified",
+            request=request,
+        )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=EMAIL_VERIFICATION_REQUIRED_ERROR,
@@ -199,18 +242,35 @@ async def login_service(
     if user.twofa_enabled and (
         not user_input.twofa_token or not check_2fa_token(user, user_input.twofa_token)
     ):
+        if user_input.twofa_token:
+            # A wrong code counts like a wrong password: 6 digits are guessable
+            await record_login_failure(normalized_email, request)
+        login_attempt_recorder.record(
+            normalized_email,
+            success=False,
+            user_id=user.id,
+            failure_reason="twofa_required",
+            request=request,
+        )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=TWOFA_REQUIRED_ERROR,
         )
 
-    access_token = create_access_token(data={"sub": user.email})
-    refresh_token = create_refresh_token(data={"sub": user.email})
+    await reset_login_failures(normalized_email)
+    login_attempt_recorder.record(
+        normalized_email, success=True, user_id=user.id, request=request
+    )
+
+    claims = {"sub": user.email, "ver": user.token_version}
+    access_token = create_access_token(data=claims)
+    refresh_token = create_refresh_token(data=claims)
 
     hashed_refresh_token = hash_token(refresh_token)
     db_refresh_token = RefreshToken(
         user_id=user.id,
         token_hash=hashed_refresh_token,
+        family_id=uuid.uuid4(),
         expires_at=datetime.now(timezone.utc)
         + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
     )
@@ -225,16 +285,46 @@ async def login_service(
     )
 
 
+async def revoke_all_sessions(db: AsyncSession, user_id: uuid.UUID, email: str) -> None:
+    """
+    Log the user out everywhere by bumping their token generation: every
+    access and refresh token issued so far carries the old ``ver`` and is
+    rejected from now on, without touching a single token row. Other workers
+    notice once their local principal cache entry expires
+    (USER_PRINCIPAL_LOCAL_TTL seconds at most).
+    """
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(token_version=User.token_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    await invalidate_user_principal(email)
+    metrics.counter("auth.revoke_all_sessions").inc()
+
+
 async def logout_user_session(request: Request, response: Response, db: AsyncSession):
     if refresh_token := request.cookies.get("refresh_token"):
         hashed_token = hash_token(refresh_token)
-        result = await db.execute(
-            select(RefreshToken).filter(RefreshToken.token_hash == hashed_token)
-        )
+        result = await db.execute(REFRESH_TOKEN_BY_HASH, {"token_hash": hashed_token})
         if db_token := result.scalar_one_or_none():
             db_token.is_revoked = True
+            db_token.revoked_at = datetime.now(timezone.utc)
             await db.commit()
 
+    # The access token itself stays valid until ``exp`` unless revoked
+    access_token = get_token_from_cookies(request, ACCESS_TOKEN_NAME)
+    if (
+        access_token
+        and (payload := verify_access_token(access_token))
+        and (jti := payload.get("jti"))
+    ):
+        try:
+            await revoked_tokens.revoke(jti, payload["exp"])
+        except Exception as e:
+            logger.warning(f"Failed to revoke access token on logout: {e}")
+
     # Clear both token cookies
     delete_auth_cookies(response)
     return {"message": "Logout success."}
@@ -243,7 +333,7 @@ async def logout_user_session(request: Request, response: Response, db: AsyncSes
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
 
-async def get_current_user(token: str, db: AsyncSession) -> User:
+async def get_current_user(token: str, db: AsyncSession) -> UserPrincipal:
     payload = verify_access_token(token)
 
     if not payload or "sub" not in payload:
@@ -253,20 +343,40 @@ async def get_current_user(token: str, db: AsyncSession) -> User:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # A local Bloom filter test; Redis is only asked on a possible hit
+    if (jti := payload.get("jti")) and await revoked_tokens.is_revoked(jti):
+        metrics.counter("revoked_tokens.rejected").inc()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=SESSION_REVOKED_ERROR,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
     email = payload.get("sub")
 
-    user = await get_user_by_email(db, email)
-    if user is None:
+    if not (principal := await get_cached_principal(email)):
+        user = await get_user_by_email(db, email)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=USER_NOT_FOUND_ERROR,
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        principal = await cache_principal(user)
+
+    # Tokens issued before the last revoke-all carry an older generation
+    if payload.get("ver", 0) != principal.token_version:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=USER_NOT_FOUND_ERROR,
+            detail=SESSION_REVOKED_ERROR,
             headers={"WWW-Authenticate": "Bearer"},
         )
-
-    return user
+    return principal
 
 
-async def get_current_user_from_cookie(request: Request, db: AsyncSession) -> User:
+async def get_current_user_from_cookie(
+    request: Request, db: AsyncSession
+) -> UserPrincipal:
     if not (token := get_token_from_cookies(request, ACCESS_TOKEN_NAME)):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -277,7 +387,34 @@ async def get_current_user_from_cookie(request: Request, db: AsyncSession) -> Us
     return await get_current_user(token, db)
 
 
-async def refresh_access_token(db: AsyncSession, refresh_token: str) -> str:
+async def _revoke_reused_token_family(db: AsyncSession, token_hash: str) -> None:
+    """
+    Called when a refresh token was not accepted. If it is a token that was
+    already rotated out, someone is replaying it: revoke every token of its
+    family so neither the attacker nor the victim can refresh again. A reuse
+    within REFRESH_TOKEN_REUSE_GRACE_SECONDS of the rotation is treated as
+    two tabs racing to refresh and only rejected.
+    """
+    result = await db.execute(REVOKE_REUSED_TOKEN_FAMILY, {"reused_hash": token_hash})
+    await db.commit()
+    if result.rowcount:
+        metrics.counter("refresh_token.reuse_detected").inc()
+        logger.warning(
+            f"Refresh token reuse detected, revoked {result.rowcount} tokens "
+            "of its family."
+        )
+
+
+async def refresh_access_token(db: AsyncSession, refresh_token: str) -> Tuple[str, str]:
+    """
+    Exchange ``refresh_token`` for a new access token and a new refresh token.
+
+    Validating, revoking the presented token and inserting its replacement
+    happen in one statement (and one round trip): a data-modifying CTE
+    revokes the token if it is live, a second one inserts the successor into
+    the same family, and the outer query confirms the owner still exists and
+    has not revoked all sessions since the token was issued.
+    """
     payload = verify_refresh_token(refresh_token)
 
     if not payload or "sub" not in payload:
@@ -288,47 +425,63 @@ async def refresh_access_token(db: AsyncSession, refresh_token: str) -> str:
         )
 
     email = payload.get("sub")
-    user = await find_user_by_email(db, email)
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    hashed_token = hash_token(refresh_token)
-    stmt = select(RefreshToken).filter(
-        RefreshToken.token_hash == hashed_token,
-        RefreshToken.is_revoked.is_(False),
-        RefreshToken.expires_at > datetime.now(timezone.utc),
+    claims = {"sub": email, "ver": payload.get("ver", 0)}
+    token_hash = hash_token(refresh_token)
+    new_refresh_token = create_refresh_token(data=claims)
+
+    result = await db.execute(
+        ROTATE_REFRESH_TOKEN,
+        {
+            "presented_hash": token_hash,
+            "successor_hash": hash_token(new_refresh_token),
+            "successor_expires_at": datetime.now(timezone.utc)
+            + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            "owner_email": email,
+            "owner_token_version": claims["ver"],
+        },
     )
-    result = await db.execute(stmt)
-    if result.scalars().first() is None:
+    if result.scalar_one_or_none() is None:
+        await db.rollback()
+        await _revoke_reused_token_family(db, token_hash)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired refresh token",
         )
+    await db.commit()
 
-    return create_access_token(data={"sub": user.email})
+    return create_access_token(data=claims), new_refresh_token
 
 
 async def change_password_service(
-    db: AsyncSession, current_user: User, old_password: str, new_password: str
+    db: AsyncSession,
+    current_user: UserPrincipal,
+    old_password: str,
+    new_password: str,
 ) -> User:
-    if not verify_password(old_password, current_user.password_hash):
+    # The cached principal carries no password hash; verify against the row
+    result = await db.execute(USER_BY_ID, {"user_id": current_user.id})
+    user = result.scalar_one()
+    if not await password_hasher.verify(old_password, user.password_hash):
         raise ValueError("Old password is incorrect")
 
-    current_user.password_hash = hash_password(new_password)
+    password_hash = await password_hasher.hash(new_password)
 
     try:
+        # "fetch" syncs ``user`` from the UPDATE itself, no reload
+        await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(password_hash=password_hash, token_version=User.token_version + 1)
+            .execution_options(synchronize_session="fetch")
+        )
         await db.commit()
-        await db.refresh(current_user)
-        return current_user
     except Exception as e:
         await db.rollback()
         raise ValueError(f"Failed to change password: {str(e)}") from e
 
+    await invalidate_user_principal(current_user.email)
+    return user
+
 
 async def create_password_reset_token_service(
     db: AsyncSession, email: str
@@ -347,52 +500,63 @@ async def create_password_reset_token_service(
     token_hash = hash_token(token)
     user.last_password_reset_token_hash = token_hash
 
-    db.add(user)
     await db.commit()
-    await db.refresh(user)
 
     return user, token
 
 
-async def verify_password_reset_service(db: AsyncSession, token: str) -> Optional[User]:
-    payload = verify_access_token(token)
-    if not payload:
-        return False
-    if payload.get("type") != "password_reset":
-        return False
-
-    user_id = uuid.UUID(payload.get("id"))
-    user = await get_user_by_id(db, user_id)
-
-    if not user:
-        return False
-    if payload.get("sub") != user.email:
-        return False
-
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
-    if user.last_password_reset_token_hash != token_hash:
-        return False
-
-    return user
-
-
 async def reset_password_service(
     db: AsyncSession, token: str, new_password: str
 ) -> bool:
-    user = await verify_password_reset_service(db, token)
-    if not user:
+    """
+    Set a new password if ``token`` is the user's current reset token.
+
+    The token's user, email and hash are checked in the UPDATE's WHERE
+    clause, so validating the token and writing the password is one
+    statement; returns False if no row matched.
+    """
+    payload = verify_access_token(token)
+    if not payload or payload.get("type") != "password_reset":
         return False
 
-    user.password_hash = hash_password(new_password)
-    user.last_password_reset_token_hash = None
-    user.last_password_reset_at = datetime.now(timezone.utc)
-    db.add(user)
+    password_hash = await password_hasher.hash(new_password)
+    result = await db.execute(
+        update(User)
+        .where(
+            User.id == uuid.UUID(payload.get("id")),
+            User.email == payload.get("sub"),
+            User.last_password_reset_token_hash == hash_token(token),
+        )
+        .values(
+            password_hash=password_hash,
+            last_password_reset_token_hash=None,
+            last_password_reset_at=func.now(),
+            # Whoever knew the old password must not keep a session
+            token_version=User.token_version + 1,
+        )
+        .returning(User.email)
+        .execution_options(synchronize_session=False)
+    )
+    if (email := result.scalar_one_or_none()) is None:
+        await db.rollback()
+        return False
     await db.commit()
+    await invalidate_user_principal(email)
     return True
 
 
-async def setup_2fa(db: AsyncSession, current_user: User) -> dict:
-    result = await db.execute(select(User).filter(User.id == current_user.id))
+async def setup_2fa(
+    db: AsyncSession,
+    current_user: UserPrincipal,
+    qr_format: QRCodeFormat = QRCodeFormat.PNG,
+) -> Tuple[str, str, Optional[str]]:
+    """
+    Returns the user's TOTP secret, its otpauth:// URI and the URI's QR code
+    as a data URL in ``qr_format`` (None when only the URI was asked for).
+    """
+    import pyotp
+
+    result = await db.execute(USER_BY_ID, {"user_id": current_user.id})
     user = result.scalar_one()
     if not user.twofa_secret:
         secret = pyotp.random_base32()
@@ -404,18 +568,15 @@ async def setup_2fa(db: AsyncSession, current_user: User) -> dict:
     otp_uri = pyotp.totp.TOTP(secret).provisioning_uri(
         name=user.email, issuer_name=settings.APP_NAME
     )
+    qr_code_url = await qr_codes.render(user.id, otp_uri, qr_format)
 
-    qr = qrcode.make(otp_uri)
-    buf = io.BytesIO()
-    qr.save(buf, format="PNG")
-    qr_b64 = base64.b64encode(buf.getvalue()).decode("utf-8")
-    qr_code_url = f"data:image/png;base64,{qr_b64}"
+    return secret, otp_uri, qr_code_url
 
-    return secret, qr_code_url
 
+async def verify_2fa(db: AsyncSession, current_user: UserPrincipal, token: str) -> dict:
+    import pyotp
 
-async def verify_2fa(db: AsyncSession, current_user: User, token: str) -> dict:
-    result = await db.execute(select(User).filter(User.id == current_user.id))
+    result = await db.execute(USER_BY_ID, {"user_id": current_user.id})
     user = result.scalar_one()
     if not user.twofa_secret:
         raise HTTPException(status_code=400, detail="2FA not set up")
@@ -423,6 +584,7 @@ async def verify_2fa(db: AsyncSession, current_user: User, token: str) -> dict:
     if totp.verify(token):
         user.twofa_enabled = True
         await db.commit()
+        await invalidate_user_principal(current_user.email)
         return {"message": "2FA enabled successfully"}
     else:
         raise HTTPException(status_code=400, detail="Invalid 2FA token")
@@ -431,49 +593,50 @@ async def verify_2fa(db: AsyncSession, current_user: User, token: str) -> dict:
 def check_2fa_token(user: User, token: str) -> bool:
     if not user.twofa_enabled or not user.twofa_secret:
         return True  # 2FA not enabled, so always pass
+    import pyotp
+
     totp = pyotp.TOTP(user.twofa_secret)
     return totp.verify(token)
 
 
 async def verify_email_service(db: AsyncSession, token: str) -> str:
-    stmt = select(User).filter(
-        cast(User.user_data, JSON)["verification_token"].as_string() == token
+    result = await db.execute(
+        select(EmailVerificationToken, User)
+        .join(User, User.id == EmailVerificationToken.user_id)
+        .where(EmailVerificationToken.token_hash == hash_token(token))
     )
-    result = await db.execute(stmt)
-    user = result.scalar_one_or_none()
-    if not user:
+    row = result.first()
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=INVALID_VERIFICATION_TOKEN_ERROR,
         )
+    verification, user = row
+    email = user.email
     if user.is_user_confirmed:
         return EMAIL_ALREADY_VERIFIED
     if (
         settings.USER_VERIFICATION_CHECK
-        and user.user_data
-        and "verification_expiry" in user.user_data
+        and datetime.now(timezone.utc) > verification.expires_at
     ):
-        expiry_str = user.user_data.get("verification_expiry")
-        try:
-            expiry = datetime.fromisoformat(expiry_str)
-            if datetime.now(timezone.utc) > expiry:
-                new_token = generate_verification_token()
-                new_expiry = datetime.now(timezone.utc) + timedelta(
-                    minutes=settings.USER_VERIFICATION_EXPIRE_MINUTES
-                )
-                user.user_data["verification_token"] = new_token
-                user.user_data["verification_expiry"] = new_expiry.isoformat()
-                await db.commit()
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=VERIFICATION_TOKEN_EXPIRED_ERROR,
-                )
-        except ValueError as e:
-            logger.error(f"Error parsing verification expiry: {e}")
+        new_token = await issue_verification_token(db, user.id)
+        verification_email = VerificationEmail()
+        await verification_email.send(
+            email_to=user.email,
+            db=db,
+            first_name=user.first_name,
+            verification_link=f"{settings.FRONTEND_URL}/auth/verify?token={new_token}",
+        )
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=VERIFICATION_TOKEN_EXPIRED_ERROR,
+        )
 
     user.is_user_confirmed = True
-    if user.user_data:
-        user.user_data["verified"] = True
-        user.user_data["verified_at"] = datetime.now(timezone.utc).isoformat()
+    await db.execute(
+        delete(EmailVerificationToken).where(EmailVerificationToken.user_id == user.id)
+    )
     await db.commit()
+    await invalidate_user_principal(email)
     return EMAIL_VERIFIED_SUCCESS
@@ -0,0 +1,104 @@
+import asyncio
+import base64
+import io
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from enum import Enum
+from typing import Hashable, Optional
+
+from app.utils.cache import TTLCache
+from app.utils.config import settings
+from app.utils.metrics import metrics
+
+
+class QRCodeFormat(str, Enum):
+    PNG = "png"
+    SVG = "svg"
+    # Only the otpauth:// URI; the client draws the code itself
+    URI = "uri"
+
+
+# qrcode (and through it PIL) is imported by the worker thread that first
+# draws a code, keeping it out of process startup
+def _png_data_url(otp_uri: str) -> str:
+    import qrcode
+
+    buf = io.BytesIO()
+    qrcode.make(otp_uri).save(buf, format="PNG")
+    return f"data:image/png;base64,{base64.b64encode(buf.getvalue()).decode()}"
+
+
+def _svg_data_url(otp_uri: str) -> str:
+    import qrcode
+    import qrcode.image.svg
+
+    # Drawn as a single vector path, no raster image involved
+    image = qrcode.make(otp_uri, image_factory=qrcode.image.svg.SvgPathImage)
+    return f"data:image/svg+xml;base64,{base64.b64encode(image.to_string()).decode()}"
+
+
+_RENDERERS = {QRCodeFormat.PNG: _png_data_url, QRCodeFormat.SVG: _svg_data_url}
+
+
+class QRCodeRenderer:
+    """
+    Draws 2FA provisioning QR codes as data URLs on a small thread pool and
+    keeps each result for ``ttl`` seconds, so reopening the setup page with
+    the same secret does not draw the code again. Concurrent requests for
+    the same code share one drawing.
+    """
+
+    def __init__(self, workers: int = 2, ttl: float = 300, maxsize: int = 1024):
+        self.workers = workers
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: dict = {}
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="qr-code"
+            )
+        return self._executor
+
+    async def render(
+        self, owner: Hashable, otp_uri: str, qr_format: QRCodeFormat
+    ) -> Optional[str]:
+        """
+        QR code of ``otp_uri`` as a data URL, or None for ``QRCodeFormat.URI``.
+        ``owner`` and the URI, which carries the secret, form the cache key.
+        """
+        if qr_format is QRCodeFormat.URI:
+            return None
+
+        key = (owner, otp_uri, qr_format)
+        if (data_url := self._cache.get(key)) is not None:
+            metrics.counter("twofa_qr.cache_hits").inc()
+            return data_url
+
+        if (task := self._inflight.get(key)) is None:
+            metrics.counter("twofa_qr.cache_misses").inc()
+            task = self._inflight[key] = asyncio.create_task(
+                self._draw(key, otp_uri, qr_format)
+            )
+        # A caller that goes away leaves the drawing to the others
+        return await asyncio.shield(task)
+
+    async def _draw(self, key: tuple, otp_uri: str, qr_format: QRCodeFormat) -> str:
+        started_at = time.perf_counter()
+        try:
+            data_url = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), _RENDERERS[qr_format], otp_uri
+            )
+            self._cache.set(key, data_url)
+            return data_url
+        finally:
+            del self._inflight[key]
+            metrics.histogram(f"twofa_qr.render_ms.{qr_format.value}").observe(
+                (time.perf_counter() - started_at) * 1000
+            )
+
+
+qr_codes = QRCodeRenderer(
+    workers=settings.TWOFA_QR_WORKERS, ttl=settings.TWOFA_QR_CACHE_TTL
+)
@@ -1,11 +1,11 @@
+import hmac
 import os
 from pathlib import Path
+from typing import Optional
 
-import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, status
 from fastapi.exceptions import HTTPException, RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import ValidationError
 from slowapi import _rate_limit_exceeded_handler
@@ -19,14 +19,20 @@ from app.utils.exception_handler import (
     validation_exception_handler,
 )
 from app.utils.lifespan import lifespan_handler
-from app.utils.response import success_response
+from app.utils.metrics import metrics
+from app.utils.rate_limiter import limiter
+from app.utils.response import FastJSONResponse, fast_success_response
 
 from .utils.logging import LogLevels, configure_logging
 
-sentry_sdk.init(
-    dsn=settings.SENTRY_DSN,
-    send_default_pii=True,
-)
+# sentry_sdk alone takes a sizeable share of worker startup; skip it unless used
+if settings.SENTRY_DSN:
+    import sentry_sdk
+
+    sentry_sdk.init(
+        dsn=settings.SENTRY_DSN,
+        send_default_pii=True,
+    )
 
 
 def create_app() -> FastAPI:
@@ -36,6 +42,7 @@ def create_app() -> FastAPI:
         version="1.0.0",
         debug=settings.DEBUG,
         lifespan=lifespan_handler,
+        default_response_class=FastJSONResponse,
     )
 
     configure_logging(log_level=LogLevels.info)
@@ -43,6 +50,7 @@ def create_app() -> FastAPI:
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
     app.add_exception_handler(ValidationError, pydantic_validation_exception_handler)
     app.add_exception_handler(HTTPException, http_exception_handler)
+    app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
     app.add_middleware(
@@ -56,13 +64,23 @@ def create_app() -> FastAPI:
     # API health check endpoint
     @app.get("/api/health")
     async def health_check():
-        return JSONResponse(
-            content=success_response(
-                data={"status": "ok", "message": "API is running"},
-                meta_data={"version": "1.0.0", "timestamp": "2024-07-24T10:00:00Z"},
-            )
+        return fast_success_response(
+            data={"status": "ok", "message": "API is running"},
+            meta_data={"version": "1.0.0", "timestamp": "2024-07-24T10:00:00Z"},
         )
 
+    # In-process metrics (queue waits, cache hits, pool usage, ...), for
+    # scrapers holding METRICS_TOKEN only
+    @app.get("/api/metrics", include_in_schema=False)
+    async def metrics_snapshot(authorization: Optional[str] = Header(None)):
+        if not settings.METRICS_TOKEN:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+        if not authorization or not hmac.compare_digest(
+            authorization.encode(), f"Bearer {settings.METRICS_TOKEN}".encode()
+        ):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        return fast_success_response(data=metrics.snapshot())
+
     # Register API routes
     register_routes(app)
 
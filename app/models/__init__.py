@@ -1,5 +1,12 @@
-from .user_managment.token import LoginAttempt, RefreshToken
+from .messaging.email_outbox import EmailOutbox
+from .user_managment.token import EmailVerificationToken, LoginAttempt, RefreshToken
 from .user_managment.user import User
 
 # Export all models
-__all__ = ("LoginAttempt", "RefreshToken", "User")
+__all__ = (
+    "EmailOutbox",
+    "EmailVerificationToken",
+    "LoginAttempt",
+    "RefreshToken",
+    "User",
+)
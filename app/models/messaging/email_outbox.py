@@ -0,0 +1,34 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, Text, func
+
+from app.utils.database import Base
+
+EMAIL_STATUS_PENDING = "pending"
+EMAIL_STATUS_FAILED = "failed"
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(BigInteger, primary_key=True)
+    email_to = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    html_content = Column(Text, nullable=False)
+    text_content = Column(Text, nullable=True)
+    status = Column(String(16), default=EMAIL_STATUS_PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    # Earliest time the row may be (re)claimed; also acts as the claim lease
+    next_attempt_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    last_error = Column(Text, nullable=True)
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_email_outbox_pending",
+            "next_attempt_at",
+            postgresql_where=(status == EMAIL_STATUS_PENDING),
+        ),
+    )
@@ -1,6 +1,14 @@
-from datetime import datetime, timezone
-
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -15,27 +23,65 @@ class RefreshToken(Base):
     token_hash = Column(
         String, unique=True, index=True
     )  # Store hash instead of raw token
-    expires_at = Column(DateTime(timezone=True))  # Add timezone=True
+    # Every token rotated from the same login shares the family; replaying a
+    # rotated-out token revokes the whole family
+    family_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), index=True)  # Add timezone=True
     is_revoked = Column(Boolean, default=False)
-    created_at = Column(
-        DateTime(timezone=True), default=datetime.now(timezone.utc)
-    )  # Add timezone=True
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), default=func.now())
 
     # Relationships
     user = relationship("User", back_populates="refresh_tokens")
 
+    __table_args__ = (
+        # Lets the cleanup job find revoked rows without scanning live ones
+        Index(
+            "ix_refresh_tokens_revoked_at",
+            "revoked_at",
+            postgresql_where=(is_revoked.is_(True)),
+        ),
+    )
+
 
 class LoginAttempt(Base):
+    """
+    Audit trail of login attempts, range-partitioned by month on
+    ``created_at``; partitions are created ahead of time and dropped after the
+    retention window by the scheduler. Rows are written in batches by
+    ``app.features.auth.audit.login_attempt_recorder``, so ``created_at`` is
+    the time of the attempt, not of the insert.
+    """
+
     __tablename__ = "login_attempts"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime(timezone=True), primary_key=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), index=True)
-    success = Column(Boolean, default=False)
+    email = Column(String, nullable=True)
+    success = Column(Boolean, default=False, nullable=False)
+    failure_reason = Column(String(32), nullable=True)
     ip_address = Column(String)
     user_agent = Column(String)
-    created_at = Column(
-        DateTime(timezone=True), default=datetime.now(timezone.utc)
-    )  # Add timezone=True
 
     # Relationships
     user = relationship("User", back_populates="login_attempts")
+
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+
+
+class EmailVerificationToken(Base):
+    __tablename__ = "email_verification_tokens"
+
+    # SHA-256 of the emailed token; the raw token is never stored
+    token_hash = Column(String(64), primary_key=True)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        index=True,
+        nullable=False,
+    )
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Boolean, Column, DateTime, String, func
+from sqlalchemy import Boolean, Column, DateTime, Integer, String, func
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 
@@ -22,6 +22,8 @@ class User(Base):
     last_password_reset_at = Column(DateTime(timezone=True), nullable=True)
     twofa_enabled = Column(Boolean, default=False, nullable=False)
     twofa_secret = Column(String, nullable=True)
+    # Embedded in issued JWTs as ``ver``; bumping it revokes every session
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
 
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -30,5 +32,9 @@ class User(Base):
     refresh_tokens = relationship("RefreshToken", back_populates="user")
     login_attempts = relationship("LoginAttempt", back_populates="user")
 
+    # Fetch server defaults such as ``created_at`` through INSERT ... RETURNING
+    # instead of leaving them expired
+    __mapper_args__ = {"eager_defaults": True}
+
     def __repr__(self):
         return f"<User(email='{self.email}', first_name='{self.first_name}', last_name='{self.last_name}')>"
@@ -2,6 +2,7 @@ from fastapi import BackgroundTasks
 
 from app.services.email.base import BaseEmail
 from app.services.email.email_service import email_service
+from app.services.email.queue import email_dispatcher, enqueue_email
 from app.services.email.types import (
     AccountExistsEmail,
     NotificationEmail,
@@ -12,6 +13,8 @@ from app.services.email.types import (
 
 __all__ = [
     "email_service",
+    "email_dispatcher",
+    "enqueue_email",
     "BaseEmail",
     "PasswordResetEmail",
     "WelcomeEmail",
@@ -1,11 +1,14 @@
 import datetime
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Optional, Tuple, Union
 
 from fastapi import BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services.email.email_service import email_service
-from app.services.email.templates import render_template
+from app.services.email.queue import enqueue_email
+from app.services.email.templates import email_templates, render_template
+from app.utils.config import settings
 
 
 class BaseEmail(ABC):
@@ -32,19 +35,36 @@ class BaseEmail(ABC):
         context = self.get_context(**kwargs)
         return render_template(self.template_name, **context)
 
+    def render(self, **kwargs) -> Tuple[str, str]:
+        """HTML body and plain-text alternative."""
+        context = self.get_context(**kwargs)
+        return email_templates.render(self.template_name, **context)
+
     async def send(
         self,
         email_to: str,
         background_tasks: Optional[BackgroundTasks] = None,
+        db: Optional[AsyncSession] = None,
         **kwargs,
     ) -> Union[bool, None]:
-        html_content = self.render_email(**kwargs)
+        html_content, text_content = self.render(**kwargs)
+        if settings.EMAIL_QUEUE_ENABLED:
+            # Passing ``db`` ties the email to the caller's transaction
+            await enqueue_email(
+                email_to=email_to,
+                subject=self.subject,
+                html_content=html_content,
+                text_content=text_content,
+                db=db,
+            )
+            return None
         if background_tasks:
             background_tasks.add_task(
                 email_service.send_email,
                 email_to=email_to,
                 subject=self.subject,
                 html_content=html_content,
+                text_content=text_content,
             )
             return None
         else:
@@ -52,4 +72,5 @@ class BaseEmail(ABC):
                 email_to=email_to,
                 subject=self.subject,
                 html_content=html_content,
+                text_content=text_content,
             )
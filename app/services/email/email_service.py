@@ -1,35 +1,51 @@
 import logging
 import re
-import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from typing import Optional
 
+from app.services.email.transport import SMTPTransport
 from app.utils.config import settings
 
 logger = logging.getLogger(__name__)
 
 
 class EmailService:
-    async def send_email(
-        self,
-        email_to: str,
-        subject: str,
-        html_content: str,
-        text_content: Optional[str] = None,
-    ) -> bool:
-        if not all(
+    def __init__(self):
+        self._transport: Optional[SMTPTransport] = None
+
+    def is_configured(self) -> bool:
+        return all(
             [
                 settings.SMTP_HOST,
                 settings.SMTP_PORT,
-                settings.SMTP_USER,
-                settings.SMTP_PASSWORD,
                 settings.EMAILS_FROM_EMAIL,
             ]
-        ):
-            logger.error("Email settings not configured")
-            return False
+        )
+
+    @property
+    def transport(self) -> SMTPTransport:
+        if self._transport is None:
+            self._transport = SMTPTransport(
+                host=str(settings.SMTP_HOST),
+                port=int(settings.SMTP_PORT),
+                username=settings.SMTP_USER,
+                password=settings.SMTP_PASSWORD,
+                use_tls=settings.SMTP_TLS,
+                pool_size=settings.SMTP_POOL_SIZE,
+                idle_timeout=settings.SMTP_IDLE_TIMEOUT,
+                max_messages_per_connection=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+                timeout=settings.SMTP_TIMEOUT,
+            )
+        return self._transport
 
+    def build_message(
+        self,
+        email_to: str,
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None,
+    ) -> MIMEMultipart:
         message = MIMEMultipart("alternative")
         message["Subject"] = subject
         message["From"] = f"{settings.EMAILS_FROM_NAME} <{settings.EMAILS_FROM_EMAIL}>"
@@ -43,27 +59,28 @@ class EmailService:
         part2 = MIMEText(html_content, "html")
         message.attach(part1)
         message.attach(part2)
+        return message
+
+    async def send_email(
+        self,
+        email_to: str,
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None,
+    ) -> bool:
+        if not self.is_configured():
+            logger.error("Email settings not configured")
+            return False
+
+        message = self.build_message(email_to, subject, html_content, text_content)
 
         try:
-            if not settings.SMTP_HOST or not settings.SMTP_PORT:
-                raise ValueError("SMTP_HOST and SMTP_PORT must be set")
-
-            server = smtplib.SMTP(str(settings.SMTP_HOST), int(settings.SMTP_PORT))
-            if settings.SMTP_TLS:
-                server.starttls()
-
-            if not settings.SMTP_USER or not settings.SMTP_PASSWORD:
-                raise ValueError("SMTP_USER and SMTP_PASSWORD must be set")
-            server.login(str(settings.SMTP_USER), str(settings.SMTP_PASSWORD))
-
-            if not settings.EMAILS_FROM_EMAIL:
-                raise ValueError("EMAILS_FROM_EMAIL must be set")
-            print(
-                server.sendmail(
-                    str(settings.EMAILS_FROM_EMAIL), email_to, message.as_string()
-                )
+            refused = await self.transport.send_message(
+                str(settings.EMAILS_FROM_EMAIL), message
             )
-            server.quit()
+            if refused:
+                logger.warning(f"Email to {email_to} refused recipients: {refused}")
+                return False
 
             logger.info(f"Email sent successfully to {email_to}")
             return True
@@ -72,6 +89,10 @@ class EmailService:
             logger.error(f"Error sending email: {str(e)}")
             return False
 
+    async def close(self) -> None:
+        if self._transport is not None:
+            await self._transport.close()
+
 
 # Singleton instance of the email service for use across the application --> Intentional by @mtalhazulf
 email_service = EmailService()
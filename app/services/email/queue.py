@@ -0,0 +1,245 @@
+import asyncio
+import contextlib
+import logging
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import EmailOutbox
+from app.models.messaging.email_outbox import EMAIL_STATUS_FAILED, EMAIL_STATUS_PENDING
+from app.services.email.email_service import EmailService, email_service
+from app.utils.config import settings
+from app.utils.database import async_session
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+async def enqueue_email(
+    email_to: str,
+    subject: str,
+    html_content: str,
+    text_content: Optional[str] = None,
+    db: Optional[AsyncSession] = None,
+) -> None:
+    """
+    Persist an outbound email for the dispatcher.
+
+    When ``db`` is given the row joins the caller's transaction and is only
+    sent once the caller commits; otherwise it is committed right away.
+    """
+    row = EmailOutbox(
+        email_to=email_to,
+        subject=subject,
+        html_content=html_content,
+        text_content=text_content,
+        status=EMAIL_STATUS_PENDING,
+        attempts=0,
+    )
+    if db is not None:
+        db.add(row)
+    else:
+        async with async_session() as session:
+            session.add(row)
+            await session.commit()
+        email_dispatcher.wakeup()
+    metrics.counter("email_queue.enqueued").inc()
+
+
+class EmailDispatcher:
+    """
+    Drains ``email_outbox`` in batches.
+
+    Rows are claimed with ``FOR UPDATE SKIP LOCKED`` so any number of workers
+    can run a dispatcher side by side; a claim pushes ``next_attempt_at``
+    forward by ``lease_seconds`` so rows held by a crashed worker become
+    claimable again. Sent rows are deleted, failed ones are retried with
+    exponential backoff and parked as ``failed`` after ``max_attempts``.
+    """
+
+    def __init__(
+        self,
+        service: EmailService,
+        batch_size: int = 50,
+        concurrency: int = 4,
+        poll_interval: float = 2,
+        max_attempts: int = 8,
+        backoff_base: float = 30,
+        backoff_max: float = 3600,
+        lease_seconds: int = 300,
+    ):
+        self.service = service
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def wakeup(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        if not self.service.is_configured():
+            logger.warning("Email settings not configured, dispatcher not started.")
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Email dispatcher started.")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        logger.info("Email dispatcher stopped.")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await self.dispatch_batch()
+            except Exception as exc:
+                logger.error(f"Email dispatcher: batch failed: {exc}")
+                claimed = 0
+            if claimed < self.batch_size:
+                self._wakeup.clear()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+
+    async def _claim(self) -> List[EmailOutbox]:
+        claimable = (
+            select(EmailOutbox.id)
+            .where(
+                EmailOutbox.status == EMAIL_STATUS_PENDING,
+                EmailOutbox.next_attempt_at <= func.now(),
+            )
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(claimable))
+            .values(
+                attempts=EmailOutbox.attempts + 1,
+                next_attempt_at=func.now() + timedelta(seconds=self.lease_seconds),
+            )
+            .returning(EmailOutbox)
+            .execution_options(synchronize_session=False)
+        )
+        # Keep the claimed rows readable after commit, the send happens outside
+        async with async_session(expire_on_commit=False) as db:
+            rows = list((await db.execute(stmt)).scalars().all())
+            await db.commit()
+        return rows
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _send_chunk(self, rows: Sequence[EmailOutbox]) -> List[Optional[str]]:
+        messages = [
+            self.service.build_message(
+                row.email_to, row.subject, row.html_content, row.text_content
+            )
+            for row in rows
+        ]
+        try:
+            results = await self.service.transport.send_messages(
+                str(settings.EMAILS_FROM_EMAIL), messages, return_exceptions=True
+            )
+        except Exception as exc:
+            results = [exc] * len(rows)
+
+        errors = []
+        for result in results:
+            if isinstance(result, Exception):
+                errors.append(str(result) or type(result).__name__)
+            elif result:
+                errors.append(f"Refused recipients: {result}")
+            else:
+                errors.append(None)
+        return errors
+
+    async def dispatch_batch(self) -> int:
+        """
+        Claim and send one batch; returns the number of rows claimed.
+        """
+        started = time.perf_counter()
+        rows = await self._claim()
+        if not rows:
+            return 0
+
+        chunk_size = math.ceil(len(rows) / self.concurrency)
+        chunks = [rows[i : i + chunk_size] for i in range(0, len(rows), chunk_size)]
+        chunk_errors = await asyncio.gather(*(self._send_chunk(c) for c in chunks))
+
+        now = datetime.now(timezone.utc)
+        sent_ids, retries = [], []
+        for row, error in zip(
+            rows, (e for errors in chunk_errors for e in errors), strict=True
+        ):
+            if error is None:
+                sent_ids.append(row.id)
+                metrics.histogram("email_queue.delivery_latency_ms").observe(
+                    (now - row.created_at).total_seconds() * 1000
+                )
+                continue
+            exhausted = row.attempts >= self.max_attempts
+            retries.append(
+                {
+                    "id": row.id,
+                    "status": (
+                        EMAIL_STATUS_FAILED if exhausted else EMAIL_STATUS_PENDING
+                    ),
+                    "next_attempt_at": now
+                    + timedelta(seconds=self._backoff(row.attempts)),
+                    "last_error": error[:1000],
+                }
+            )
+            metrics.counter(
+                "email_queue.failed" if exhausted else "email_queue.retried"
+            ).inc()
+            logger.warning(
+                f"Email {row.id} to {row.email_to} failed "
+                f"(attempt {row.attempts}/{self.max_attempts}): {error}"
+            )
+
+        async with async_session() as db:
+            if sent_ids:
+                await db.execute(
+                    delete(EmailOutbox).where(EmailOutbox.id.in_(sent_ids))
+                )
+            if retries:
+                await db.execute(update(EmailOutbox), retries)
+            await db.commit()
+
+        metrics.counter("email_queue.sent").inc(len(sent_ids))
+        metrics.histogram("email_queue.batch_ms").observe(
+            (time.perf_counter() - started) * 1000
+        )
+        return len(rows)
+
+
+email_dispatcher = EmailDispatcher(
+    service=email_service,
+    batch_size=settings.EMAIL_QUEUE_BATCH_SIZE,
+    concurrency=settings.EMAIL_QUEUE_CONCURRENCY or settings.SMTP_POOL_SIZE,
+    poll_interval=settings.EMAIL_QUEUE_POLL_INTERVAL,
+    max_attempts=settings.EMAIL_QUEUE_MAX_ATTEMPTS,
+    backoff_base=settings.EMAIL_QUEUE_BACKOFF_BASE,
+    backoff_max=settings.EMAIL_QUEUE_BACKOFF_MAX,
+)
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import smtplib
+import time
+from email.message import Message
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnection:
+    def __init__(self, client: smtplib.SMTP):
+        self.client = client
+        self.opened_at = time.monotonic()
+        self.last_used = self.opened_at
+        self.messages_sent = 0
+
+    def close(self) -> None:
+        try:
+            self.client.quit()
+        except Exception:
+            self.client.close()
+
+
+class SMTPTransport:
+    """
+    Pool of authenticated SMTP connections reused across messages.
+
+    smtplib is blocking, so every network operation runs in a worker thread
+    and the event loop is never stalled. Connections idle for longer than
+    ``idle_timeout`` or that already sent ``max_messages_per_connection``
+    messages are replaced transparently. Pointing ``host``/``port`` at a local
+    server with ``use_tls=False`` and no credentials (e.g. ``aiosmtpd``) is
+    enough to exercise it without a real mail provider.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        pool_size: int = 4,
+        idle_timeout: float = 60,
+        max_messages_per_connection: int = 100,
+        timeout: float = 30,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.max_messages_per_connection = max_messages_per_connection
+        self.timeout = timeout
+        self._idle: List[SMTPConnection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _open(self) -> SMTPConnection:
+        with metrics.histogram("smtp.connect_ms").time():
+            client = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                if self.use_tls:
+                    client.starttls()
+                if self.username and self.password:
+                    client.login(self.username, self.password)
+            except Exception:
+                client.close()
+                raise
+        metrics.counter("smtp.connections_opened").inc()
+        return SMTPConnection(client)
+
+    def _is_stale(self, connection: SMTPConnection) -> bool:
+        return (
+            time.monotonic() - connection.last_used > self.idle_timeout
+            or connection.messages_sent >= self.max_messages_per_connection
+        )
+
+    def _send_batch(
+        self,
+        connection: Optional[SMTPConnection],
+        from_addr: str,
+        messages: Sequence[Message],
+        return_exceptions: bool,
+    ) -> Tuple[Optional[SMTPConnection], List[Union[Dict[str, tuple], Exception]]]:
+        """
+        Send ``messages`` back to back over a single connection, replacing it
+        first if it went stale and reconnecting once if the server dropped it.
+        """
+        if connection is not None and self._is_stale(connection):
+            connection.close()
+            connection = None
+
+        results = []
+        for message in messages:
+            try:
+                if connection is None:
+                    connection = self._open()
+                try:
+                    refused = connection.client.send_message(message, from_addr)
+                except smtplib.SMTPServerDisconnected:
+                    logger.info("SMTP connection dropped by server, reconnecting.")
+                    connection.close()
+                    connection = self._open()
+                    refused = connection.client.send_message(message, from_addr)
+                connection.messages_sent += 1
+                connection.last_used = time.monotonic()
+                results.append(refused)
+            except Exception as exc:
+                if connection is not None:
+                    connection.close()
+                    connection = None
+                if not return_exceptions:
+                    raise
+                results.append(exc)
+        return connection, results
+
+    async def send_messages(
+        self,
+        from_addr: str,
+        messages: Sequence[Message],
+        return_exceptions: bool = False,
+    ) -> List[Union[Dict[str, tuple], Exception]]:
+        """
+        Send a batch of messages on one pooled connection; returns the
+        refused-recipient mapping for each message, or the exception raised
+        for it when ``return_exceptions`` is set.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            with metrics.histogram("smtp.batch_send_ms").time():
+                connection, results = await asyncio.to_thread(
+                    self._send_batch,
+                    connection,
+                    from_addr,
+                    messages,
+                    return_exceptions,
+                )
+            if connection is not None:
+                self._idle.append(connection)
+        metrics.counter("smtp.messages_sent").inc(
+            sum(not isinstance(result, Exception) for result in results)
+        )
+        return results
+
+    async def send_message(self, from_addr: str, message: Message) -> Dict[str, tuple]:
+        return (await self.send_messages(from_addr, [message]))[0]
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await asyncio.to_thread(connection.close)
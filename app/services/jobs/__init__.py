@@ -1,3 +1,3 @@
-from .scheduler import scheduler
+from .scheduler import scheduler, scheduler_leader
 
-__all__ = ("scheduler",)
+__all__ = ("scheduler", "scheduler_leader")
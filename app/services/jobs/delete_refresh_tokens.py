@@ -1,33 +1,84 @@
+import asyncio
 import logging
-from datetime import datetime, timezone
+import time
+from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import delete
+from sqlalchemy import delete, select
 
 from app.models import RefreshToken
+from app.utils.config import settings
 from app.utils.database import async_session  # async_sessionmaker
+from app.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 
+async def _delete_in_batches(predicate, deadline: float) -> int:
+    """
+    Delete rows matching ``predicate`` in short transactions of at most
+    ``REFRESH_TOKEN_CLEANUP_BATCH_SIZE`` rows until none are left or the
+    deadline passes. Progress needs no bookkeeping: the predicate only matches
+    rows that are still there, so the next run picks up where this one stopped.
+    """
+    batch_size = settings.REFRESH_TOKEN_CLEANUP_BATCH_SIZE
+    total = 0
+    while time.monotonic() < deadline:
+        batch = (
+            select(RefreshToken.id)
+            .where(predicate)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        with metrics.histogram("refresh_token_cleanup.batch_ms").time():
+            async with async_session() as db:
+                result = await db.execute(
+                    delete(RefreshToken)
+                    .where(RefreshToken.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+
+        deleted = result.rowcount or 0
+        total += deleted
+        metrics.counter("refresh_token_cleanup.deleted").inc(deleted)
+        if deleted < batch_size:
+            break
+        # Let autovacuum, replication and concurrent writers catch up
+        await asyncio.sleep(settings.REFRESH_TOKEN_CLEANUP_PAUSE)
+    return total
+
+
 async def delete_expired_refresh_tokens() -> None:
     """
-    Async job to remove expired refresh tokens.
+    Async job to remove expired refresh tokens and revoked ones past their
+    retention window, within ``REFRESH_TOKEN_CLEANUP_TIME_BUDGET`` seconds.
     """
     logger.info("Scheduler: Running expired refresh token cleanup job.")
-    async with async_session() as db:
-        try:
-            now = datetime.now(timezone.utc)
+    deadline = time.monotonic() + settings.REFRESH_TOKEN_CLEANUP_TIME_BUDGET
+    try:
+        now = datetime.now(timezone.utc)
+        expired = await _delete_in_batches(RefreshToken.expires_at < now, deadline)
+
+        revoked_before = now - timedelta(
+            hours=settings.REVOKED_REFRESH_TOKEN_RETENTION_HOURS
+        )
+        revoked = await _delete_in_batches(
+            RefreshToken.is_revoked.is_(True)
+            & (RefreshToken.revoked_at < revoked_before),
+            deadline,
+        )
 
-            # Use a bulk DELETE for efficiency
-            result = await db.execute(
-                delete(RefreshToken).where(RefreshToken.expires_at < now)
+        if expired or revoked:
+            logger.info(
+                f"Scheduler: Deleted {expired} expired and {revoked} revoked "
+                "refresh tokens."
+            )
+        else:
+            logger.info("Scheduler: No expired refresh tokens to delete.")
+        if time.monotonic() >= deadline:
+            logger.info(
+                "Scheduler: Refresh token cleanup hit its time budget, "
+                "remaining rows are left for the next run."
             )
-            await db.commit()
-
-            deleted = result.rowcount if result is not None else 0
-            if deleted:
-                logger.info(f"Scheduler: Deleted {deleted} expired refresh tokens.")
-            else:
-                logger.info("Scheduler: No expired refresh tokens to delete.")
-        except Exception as exc:
-            logger.error(f"Scheduler: An error occurred during token cleanup: {exc}")
+    except Exception as exc:
+        logger.error(f"Scheduler: An error occurred during token cleanup: {exc}")
@@ -0,0 +1,157 @@
+import asyncio
+import contextlib
+import logging
+import math
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TRY_LOCK_QUERY = text("SELECT pg_try_advisory_lock(:lock_id)")
+CHECK_QUERY = text("SELECT 1")
+
+
+class LeaderElector:
+    """
+    Elects one leader among every process sharing the database: whichever
+    takes the session-level advisory lock ``lock_id`` first leads for as long
+    as its connection holds it.
+
+    Each process keeps one connection to ``database_url`` outside the pool.
+    Every ``check_interval`` seconds a follower retries the lock on it and the
+    leader checks that it is still alive. If the leader dies, Postgres
+    releases the lock with its session and the next follower to try takes
+    over; a leader whose connection fails or stops answering steps down at
+    its next check. TCP keepalives make Postgres drop the session of a leader
+    cut off by a network partition a few intervals later, after that leader
+    has stepped down.
+
+    A session-level lock needs a direct connection to Postgres: behind
+    PgBouncer in transaction mode, one session's statements run on different
+    server connections. Without a ``database_url`` the process never leads.
+    """
+
+    def __init__(
+        self,
+        lock_id: int,
+        database_url: Optional[str],
+        check_interval: float = 5,
+        on_elected: Optional[Callable[[], None]] = None,
+        on_demoted: Optional[Callable[[], None]] = None,
+    ):
+        self.lock_id = lock_id
+        self.database_url = database_url
+        self.check_interval = check_interval
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.is_leader = False
+        self._engine = None
+        self._connection: Optional[AsyncConnection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_engine(self):
+        if self._engine is None:
+            keepalive = str(max(math.ceil(self.check_interval), 1))
+            # Autocommit, so the held connection never idles in a transaction
+            self._engine = create_async_engine(
+                self.database_url,
+                poolclass=NullPool,
+                isolation_level="AUTOCOMMIT",
+                connect_args={
+                    "server_settings": {
+                        "tcp_keepalives_idle": keepalive,
+                        "tcp_keepalives_interval": keepalive,
+                        "tcp_keepalives_count": "3",
+                    }
+                },
+            )
+        return self._engine
+
+    async def check(self) -> None:
+        """
+        Confirm leadership over the held connection, or try to take the lock.
+        """
+        try:
+            if self._connection is None:
+                self._connection = await asyncio.wait_for(
+                    self._get_engine().connect(), self.check_interval
+                )
+            if self.is_leader:
+                await asyncio.wait_for(
+                    self._connection.execute(CHECK_QUERY), self.check_interval
+                )
+                return
+            result = await asyncio.wait_for(
+                self._connection.execute(TRY_LOCK_QUERY, {"lock_id": self.lock_id}),
+                self.check_interval,
+            )
+            if not result.scalar():
+                return
+        except Exception as e:
+            if self.is_leader:
+                logger.error(f"Lost scheduler leadership connection: {e}")
+            else:
+                logger.warning(f"Scheduler leader election failed: {e}")
+            await self._release()
+            return
+        self._set_leader(True)
+
+    def _set_leader(self, is_leader: bool) -> None:
+        if is_leader == self.is_leader:
+            return
+        self.is_leader = is_leader
+        metrics.gauge("scheduler.is_leader").set(int(is_leader))
+        if is_leader:
+            metrics.counter("scheduler.elections_won").inc()
+            logger.info("This process is now the scheduler leader.")
+            callback = self.on_elected
+        else:
+            logger.info("This process is no longer the scheduler leader.")
+            callback = self.on_demoted
+        if callback is not None:
+            callback()
+
+    async def _release(self) -> None:
+        self._set_leader(False)
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            # Closing the session releases the lock as well
+            await connection.invalidate()
+            await connection.close()
+        except Exception as e:
+            logger.warning(f"Closing the scheduler leader connection failed: {e}")
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        if self.database_url is None:
+            logger.error(
+                "Scheduler leader election needs a direct connection to Postgres; "
+                "set SCHEDULER_LEADER_DATABASE_URL. Scheduled jobs will not run."
+            )
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        await self._release()
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
@@ -0,0 +1,68 @@
+import logging
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+
+from app.utils.config import settings
+from app.utils.database import async_session
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "login_attempts"
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y%m}"
+
+
+async def maintain_login_attempt_partitions() -> None:
+    """
+    Async job that creates the monthly ``login_attempts`` partitions for the
+    next ``LOGIN_ATTEMPT_PARTITIONS_AHEAD`` months and drops those that fall
+    entirely before the ``LOGIN_ATTEMPT_RETENTION_MONTHS`` window. Dropping a
+    partition is a catalog operation, so retention costs no DELETE.
+    """
+    logger.info("Scheduler: Running login attempt partition maintenance job.")
+    this_month = datetime.now(timezone.utc).date().replace(day=1)
+    oldest_kept = _add_months(this_month, -settings.LOGIN_ATTEMPT_RETENTION_MONTHS)
+
+    async with async_session() as db:
+        try:
+            for offset in range(settings.LOGIN_ATTEMPT_PARTITIONS_AHEAD + 1):
+                month = _add_months(this_month, offset)
+                await db.execute(
+                    text(
+                        f"CREATE TABLE IF NOT EXISTS {_partition_name(month)} "
+                        f"PARTITION OF {PARENT_TABLE} FOR VALUES "
+                        f"FROM ('{month}') TO ('{_add_months(month, 1)}')"
+                    )
+                )
+
+            partitions = await db.execute(
+                text(
+                    "SELECT c.relname FROM pg_inherits i "
+                    "JOIN pg_class c ON c.oid = i.inhrelid "
+                    "JOIN pg_class p ON p.oid = i.inhparent "
+                    "WHERE p.relname = :parent"
+                ),
+                {"parent": PARENT_TABLE},
+            )
+            for (name,) in partitions:
+                suffix = name.removeprefix(f"{PARENT_TABLE}_p")
+                if not (len(suffix) == 6 and suffix.isdigit()):
+                    continue  # the default partition
+                month = date(int(suffix[:4]), int(suffix[4:]), 1)
+                if month < oldest_kept:
+                    await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                    logger.info(f"Scheduler: Dropped login attempt partition {name}.")
+
+            await db.commit()
+        except Exception as exc:
+            logger.error(
+                f"Scheduler: An error occurred during partition maintenance: {exc}"
+            )
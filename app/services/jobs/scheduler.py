@@ -1,8 +1,115 @@
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_SUBMITTED,
+    JobEvent,
+)
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
+from app.utils.config import settings
+from app.utils.metrics import metrics
+
 from .delete_refresh_tokens import delete_expired_refresh_tokens
+from .leader import LeaderElector
+from .login_attempt_partitions import maintain_login_attempt_partitions
+
+logger = logging.getLogger(__name__)
+
+JOB_DURATION_BUCKETS_MS = (10, 100, 1000, 5000, 15000, 30000, 60000, 120000, 300000)
 
-scheduler = AsyncIOScheduler()
+scheduler = AsyncIOScheduler(
+    job_defaults={
+        # A run still going when the next falls due makes that one skip
+        "max_instances": 1,
+        "coalesce": True,
+        "misfire_grace_time": settings.SCHEDULER_MISFIRE_GRACE_TIME,
+    }
+)
 
-scheduler.add_job(delete_expired_refresh_tokens, "cron", hour=0, minute=0)
+# Hourly, so a run that hits its time budget is caught up by the next one
+scheduler.add_job(
+    delete_expired_refresh_tokens,
+    "cron",
+    minute=0,
+    id="delete_expired_refresh_tokens",
+)
 # scheduler.add_job(delete_expired_refresh_tokens, "cron", minute="*")
+scheduler.add_job(
+    maintain_login_attempt_partitions,
+    "cron",
+    hour=0,
+    minute=30,
+    id="maintain_login_attempt_partitions",
+)
+
+_started_at: Dict[str, float] = {}
+
+
+def _record_job_event(event: JobEvent) -> None:
+    prefix = f"scheduler.job.{event.job_id}"
+    if event.code == EVENT_JOB_SUBMITTED:
+        _started_at[event.job_id] = time.perf_counter()
+        metrics.counter(f"{prefix}.runs").inc()
+    elif event.code == EVENT_JOB_MAX_INSTANCES:
+        metrics.counter(f"{prefix}.overlaps").inc()
+        logger.warning(
+            f"Scheduler: Skipped {event.job_id}, its previous run is still going."
+        )
+    elif event.code == EVENT_JOB_MISSED:
+        metrics.counter(f"{prefix}.missed").inc()
+    else:
+        if (started_at := _started_at.pop(event.job_id, None)) is not None:
+            metrics.histogram(f"{prefix}.duration_ms", JOB_DURATION_BUCKETS_MS).observe(
+                (time.perf_counter() - started_at) * 1000
+            )
+        if event.code == EVENT_JOB_ERROR:
+            metrics.counter(f"{prefix}.errors").inc()
+
+
+scheduler.add_listener(
+    _record_job_event,
+    EVENT_JOB_SUBMITTED
+    | EVENT_JOB_EXECUTED
+    | EVENT_JOB_ERROR
+    | EVENT_JOB_MAX_INSTANCES
+    | EVENT_JOB_MISSED,
+)
+
+
+def _leader_database_url() -> Optional[str]:
+    if settings.SCHEDULER_LEADER_DATABASE_URL:
+        return settings.SCHEDULER_LEADER_DATABASE_URL
+    # A transaction-pooling PgBouncer cannot hold a session-level lock
+    if settings.DATABASE_PGBOUNCER:
+        return None
+    return settings.DATABASE_URL
+
+
+def _take_over() -> None:
+    """
+    Resume the scheduler in a newly elected leader. Its job store still holds
+    the due times it had when it was paused, which the previous leader may
+    already have run, so each job restarts from its next future fire time.
+    """
+    now = datetime.now(scheduler.timezone)
+    for job in scheduler.get_jobs():
+        job.modify(next_run_time=job.trigger.get_next_fire_time(None, now))
+    scheduler.resume()
+
+
+# Every process runs the scheduler paused; only the elected leader resumes it.
+# A run already under way when its process is demoted is left to finish.
+scheduler_leader = LeaderElector(
+    settings.SCHEDULER_LEADER_LOCK_ID,
+    _leader_database_url(),
+    check_interval=settings.SCHEDULER_LEADER_CHECK_INTERVAL,
+    on_elected=_take_over,
+    on_demoted=scheduler.pause,
+)
@@ -1,13 +1,71 @@
+import asyncio
 import json
+import math
+import random
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date
 from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
 
 from aiocache import Cache
 from fastapi.encoders import jsonable_encoder
 
 from .config import settings
+from .logging import logging
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 _cache_instance = None
 
+# Deletes a lock only while it still holds the caller's token, so a lock that
+# outlived its lease is never released on behalf of the worker that took it over
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class TTLCache:
+    """
+    Size-bounded, process-local LRU whose entries expire after ``ttl`` seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
 
 def _get_cache() -> Cache:
     global _cache_instance
@@ -21,13 +79,180 @@ def _get_cache() -> Cache:
     return _cache_instance
 
 
-def cache_response(ttl: int = 60, namespace: str = "main", key: str = None):
+# Callers in this process waiting on the same key share one computation
+_inflight: Dict[str, "asyncio.Future"] = {}
+# Keys being refreshed in the background, and strong references to those
+# tasks so they are not garbage collected mid-flight
+_refreshing: Set[str] = set()
+_refresh_tasks: Set["asyncio.Task"] = set()
+
+# Arguments a background refresh can reuse after the response went out;
+# request-scoped ones (a DbSession, the Request, ...) are closed by then
+_PLAIN_TYPES = (str, int, float, bool, uuid.UUID, date, type(None))
+
+
+def _plain_args(args: tuple, kwargs: dict) -> bool:
+    return all(isinstance(value, _PLAIN_TYPES) for value in (*args, *kwargs.values()))
+
+
+def _is_expired(entry: dict, beta: float) -> bool:
+    """
+    XFetch early expiry: the closer the entry is to its soft expiry and the
+    longer it took to compute, the likelier a caller recomputes it early.
+    """
+    now = time.time()
+    if beta <= 0:
+        return now >= entry["exp"]
+    return now - entry["delta"] * beta * math.log(random.random()) >= entry["exp"]
+
+
+async def _acquire_lock(cache: Cache, cache_key: str, timeout: float) -> Optional[str]:
+    token = uuid.uuid4().hex
+    try:
+        await cache.add(f"{cache_key}:lock", token, ttl=timeout)
+    except ValueError:
+        return None
+    return token
+
+
+async def _release_lock(cache: Cache, cache_key: str, token: str) -> None:
+    await cache.client.eval(
+        RELEASE_LOCK_SCRIPT,
+        1,
+        cache.build_key(f"{cache_key}:lock"),
+        cache.serializer.dumps(token),
+    )
+
+
+async def _compute(
+    func: Callable, args: tuple, kwargs: dict, cache_key: str, ttl: int, stale_ttl: int
+) -> Any:
+    started = time.perf_counter()
+    response = await func(*args, **kwargs)
+    delta = time.perf_counter() - started
+    entry = {
+        "v": jsonable_encoder(response),
+        "exp": time.time() + ttl,
+        "delta": delta,
+    }
+    await _get_cache().set(cache_key, json.dumps(entry), ttl=ttl + stale_ttl)
+    return response
+
+
+async def _load(
+    func: Callable,
+    args: tuple,
+    kwargs: dict,
+    cache_key: str,
+    ttl: int,
+    stale_ttl: int,
+    lock_timeout: float,
+    wait: bool,
+) -> Any:
+    """
+    Recompute ``cache_key`` holding the cross-worker lock. When another worker
+    holds it, either poll for its result (``wait``) or give up and return None.
+    """
+    cache = _get_cache()
+    token = await _acquire_lock(cache, cache_key, lock_timeout)
+    if token is None:
+        if not wait:
+            return None
+        metrics.counter("cache.coalesced_waits").inc()
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            cached_value = await cache.get(cache_key)
+            if cached_value is not None:
+                entry = json.loads(cached_value)
+                if not _is_expired(entry, 0):
+                    return entry["v"]
+        # The lock holder died or is too slow; compute without the lock
+        return await _compute(func, args, kwargs, cache_key, ttl, stale_ttl)
+
+    try:
+        return await _compute(func, args, kwargs, cache_key, ttl, stale_ttl)
+    finally:
+        await _release_lock(cache, cache_key, token)
+
+
+async def _single_flight(cache_key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+    if future := _inflight.get(cache_key):
+        metrics.counter("cache.coalesced_waits").inc()
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # The request computing the value went away; take over
+            return await _single_flight(cache_key, load)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[cache_key] = future
+    try:
+        result = await load()
+    except Exception as exc:
+        future.set_exception(exc)
+        # Mark the exception retrieved when nobody else was waiting
+        future.exception()
+        raise
+    except BaseException:
+        future.cancel()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _inflight.pop(cache_key, None)
+
+
+def _refresh_in_background(cache_key: str, load: Callable[[], Awaitable[Any]]) -> None:
+    if cache_key in _refreshing or cache_key in _inflight:
+        return
+
+    async def refresh():
+        try:
+            await load()
+        except Exception as e:
+            logger.warning(f"Background refresh of {cache_key} failed: {e}")
+        finally:
+            _refreshing.discard(cache_key)
+
+    _refreshing.add(cache_key)
+    task = asyncio.create_task(refresh())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+def cache_response(
+    ttl: int = 60,
+    namespace: str = "main",
+    key: str = None,
+    stale_ttl: int = 0,
+    early_expiry_beta: float = 0,
+    lock_timeout: float = 10,
+):
     """
     Caching decorator for FastAPI endpoints.
 
+    Concurrent misses for one key are coalesced: a single caller per process
+    computes the value and, across workers, only the holder of a short Redis
+    lock does, while the rest wait for its result.
+
     :param ttl: Time to live for cache entry in seconds.
     :param namespace: Namespace prefix for cache keys.
     :param key: Optional fixed cache key string.
+    :param stale_ttl: Seconds past ``ttl`` during which the expired value is
+        still served while one caller refreshes it in the background.
+    :param early_expiry_beta: Enables probabilistic early refresh (XFetch) when
+        > 0; 1.0 is the usual choice, larger values refresh earlier.
+
+    Background refreshes call ``func`` again after the response has gone out,
+    so they only happen when every argument is a plain value (str, int,
+    float, bool, UUID, date or None). With a ``DbSession`` or another
+    request-scoped dependency among them, an expired value is recomputed
+    within the request instead.
+    :param lock_timeout: Lease of the cross-worker recompute lock in seconds.
     """
 
     def decorator(func):
@@ -42,17 +267,41 @@ def cache_response(ttl: int = 60, namespace: str = "main", key: str = None):
                     return await func(*args, **kwargs)
                 cache_key = f"{namespace}:user:{user_id}"
 
-            cache = _get_cache()
+            def load(wait: bool = True):
+                return _load(
+                    func,
+                    args,
+                    kwargs,
+                    cache_key,
+                    ttl,
+                    stale_ttl,
+                    lock_timeout,
+                    wait,
+                )
 
-            cached_value = await cache.get(cache_key)
-            if cached_value:
-                return json.loads(cached_value)
+            cached_value = await _get_cache().get(cache_key)
+            entry = json.loads(cached_value) if cached_value is not None else None
+            if not isinstance(entry, dict) or "exp" not in entry:
+                # Miss, or a value written before entries carried an expiry
+                metrics.counter("cache.misses").inc()
+                return await _single_flight(cache_key, load)
+
+            if not _is_expired(entry, early_expiry_beta):
+                metrics.counter("cache.hits").inc()
+                return entry["v"]
 
-            response = await func(*args, **kwargs)
-            encoded_response = jsonable_encoder(response)
+            if time.time() < entry["exp"] + stale_ttl and _plain_args(args, kwargs):
+                # Serve what we have and let one caller refresh it
+                metrics.counter(
+                    "cache.stale_hits"
+                    if time.time() >= entry["exp"]
+                    else "cache.early_refreshes"
+                ).inc()
+                _refresh_in_background(cache_key, lambda: load(wait=False))
+                return entry["v"]
 
-            await cache.set(cache_key, json.dumps(encoded_response), ttl=ttl)
-            return response
+            metrics.counter("cache.misses").inc()
+            return await _single_flight(cache_key, load)
 
         return wrapper
 
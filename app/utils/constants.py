@@ -8,10 +8,14 @@ EMAIL_ALREADY_EXISTS_ERROR = (
     "a password reset link has been sent."
 )  # nosec
 INVALID_CREDENTIALS_ERROR = "Invalid credentials"  # nosec
+TOO_MANY_LOGIN_ATTEMPTS_ERROR = (
+    "Too many failed login attempts. Please try again later."  # nosec
+)
 EMAIL_VERIFICATION_REQUIRED_ERROR = (
     "Email verification required. "
     "Please check your email inbox and verify your account."
 )  # nosec
+SESSION_REVOKED_ERROR = "Session has been revoked, please log in again"  # nosec
 TWOFA_REQUIRED_ERROR = "2FA token required or invalid"  # nosec
 INVALID_VERIFICATION_TOKEN_ERROR = "Invalid verification token"  # nosec
 VERIFICATION_TOKEN_EXPIRED_ERROR = (
@@ -1,33 +1,296 @@
-from typing import Annotated, AsyncGenerator
+import asyncio
+import contextlib
+import itertools
+import math
+import os
+import time
+from typing import Annotated, AsyncGenerator, List, Optional, Type, Union
+from uuid import uuid4
 
-from fastapi import Depends
+from fastapi import Depends, Request
+from sqlalchemy import event, text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import (
     AsyncAttrs,
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
+from app.utils.cache import TTLCache, _get_cache
 from app.utils.config import settings
+from app.utils.constants import ACCESS_TOKEN_NAME
+from app.utils.logging import logging
+from app.utils.metrics import LIFETIME_BUCKETS_S, metrics
+from app.utils.security import get_token_from_cookies, verify_access_token
+
+logger = logging.getLogger(__name__)
+
+
+def _connect_args() -> dict:
+    """
+    Prepared-statement caching for asyncpg. Behind PgBouncer in transaction
+    mode consecutive statements may run on different server connections, so
+    caches are disabled and every statement gets a unique name instead.
+    """
+    if settings.DATABASE_PGBOUNCER:
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {"prepared_statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE}
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout took, including waiting
+    for a free connection, opening a new one and the pre-ping.
+    """
+
+    metric_prefix = "db_pool"
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            metrics.counter(f"{self.metric_prefix}.checkout_timeouts").inc()
+            raise
+        finally:
+            metrics.histogram(f"{self.metric_prefix}.checkout_ms").observe(
+                (time.perf_counter() - start) * 1000
+            )
+
+
+class ReplicaQueuePool(InstrumentedQueuePool):
+    metric_prefix = "db_replica_pool"
+
+
+def _pool_size() -> int:
+    """
+    DATABASE_POOL_SIZE, or with 0 the usual ``2 * cores + 1`` active
+    connections for the host, shared by its worker processes.
+    """
+    if settings.DATABASE_POOL_SIZE > 0:
+        return settings.DATABASE_POOL_SIZE
+    cores = os.cpu_count() or 1
+    return max(math.ceil((2 * cores + 1) / max(settings.WEB_CONCURRENCY, 1)), 2)
+
+
+def _pool_options(poolclass: Type[InstrumentedQueuePool]) -> dict:
+    if settings.DATABASE_POOL_MODE == "null":
+        return {"poolclass": NullPool}
+    return {
+        "poolclass": poolclass,
+        "pool_size": _pool_size(),
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+    }
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    poolclass=AsyncAdaptedQueuePool,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    echo=False,
-)
+
+def _instrument(engine: AsyncEngine, prefix: str) -> None:
+    """
+    Export connections in use, overflow in use, connects and connection
+    lifetimes of ``engine``'s pool under ``prefix``.
+    """
+    in_use = metrics.gauge(f"{prefix}.in_use")
+
+    def record_usage(change: int) -> None:
+        # Tracked from the events rather than read off the pool: "checkin"
+        # fires before the connection is back in the queue
+        in_use.inc(change)
+        pool = engine.sync_engine.pool
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            metrics.gauge(f"{prefix}.overflow").set(max(in_use.value - pool.size(), 0))
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record) -> None:
+        connection_record.info["connected_at"] = time.monotonic()
+        metrics.counter(f"{prefix}.connects").inc()
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        record_usage(1)
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record) -> None:
+        record_usage(-1)
+
+    @event.listens_for(engine.sync_engine, "close")
+    def on_close(dbapi_connection, connection_record) -> None:
+        if connected_at := connection_record.info.pop("connected_at", None):
+            metrics.histogram(
+                f"{prefix}.connection_lifetime_s", LIFETIME_BUCKETS_S
+            ).observe(time.monotonic() - connected_at)
+
+
+def _create_engine(url: Union[str, URL], poolclass: Type[InstrumentedQueuePool]):
+    options = _pool_options(poolclass)
+    created = create_async_engine(
+        url,
+        query_cache_size=settings.DATABASE_QUERY_CACHE_SIZE,
+        connect_args=_connect_args(),
+        echo=False,
+        **options,
+    )
+    _instrument(created, poolclass.metric_prefix)
+    return created
+
+
+def _replica_url(host: str) -> URL:
+    host, _, port = host.partition(":")
+    url = make_url(settings.DATABASE_URL)
+    return url.set(host=host, port=int(port) if port else url.port)
+
+
+engine = _create_engine(settings.DATABASE_URL, InstrumentedQueuePool)
+replica_engines = [
+    _create_engine(_replica_url(host), ReplicaQueuePool)
+    for host in settings.DATABASE_REPLICA_HOSTS
+]
 
 
 class Base(AsyncAttrs, DeclarativeBase):
     pass
 
 
-async_session = async_sessionmaker(bind=engine, class_=AsyncSession)
+# Objects stay usable after commit: what was just written is what the session
+# holds (server defaults come back through RETURNING, see ``eager_defaults``),
+# so re-loading it would only cost a SELECT per object
+async_session = async_sessionmaker(
+    bind=engine, class_=AsyncSession, expire_on_commit=False
+)
+# Bound per session to whichever replica serves the request
+replica_session = async_sessionmaker(class_=AsyncSession, expire_on_commit=False)
+
+# Seconds the replica is behind; 0 when it has replayed everything received,
+# so an idle primary does not read as growing lag
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class ReplicaSet:
+    """
+    Hands out read replicas round-robin, skipping any whose replication lag
+    was over ``max_lag`` seconds (or could not be measured) at the last
+    check. Lag is checked every ``check_interval`` seconds by a background
+    task; until the first check every replica counts as unavailable.
+    """
+
+    def __init__(
+        self, engines: List[AsyncEngine], max_lag: float = 5, check_interval: float = 5
+    ):
+        self.engines = engines
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lag = [math.inf] * len(engines)
+        self._turn = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def pick(self) -> Optional[AsyncEngine]:
+        available = [
+            replica
+            for replica, lag in zip(self.engines, self._lag, strict=True)
+            if lag <= self.max_lag
+        ]
+        if not available:
+            return None
+        return available[next(self._turn) % len(available)]
+
+    async def check(self) -> None:
+        for index, replica in enumerate(self.engines):
+            try:
+                async with replica.connect() as connection:
+                    lag = float((await connection.execute(REPLICA_LAG_QUERY)).scalar())
+            except Exception as e:
+                logger.warning(f"Replica {replica.url.host} unavailable: {e}")
+                lag = math.inf
+            if lag > self.max_lag >= self._lag[index]:
+                logger.warning(
+                    f"Replica {replica.url.host} is {lag:.1f}s behind, "
+                    "reading from the primary instead"
+                )
+            self._lag[index] = lag
+            metrics.gauge(f"db_replica.{index}.lag_s").set(
+                lag if lag != math.inf else -1
+            )
+
+    def start(self) -> None:
+        if self._task is not None or not self.engines:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+
+replicas = ReplicaSet(
+    replica_engines,
+    max_lag=settings.DATABASE_REPLICA_MAX_LAG,
+    check_interval=settings.DATABASE_REPLICA_CHECK_INTERVAL,
+)
+
+RECENT_WRITE_KEY_PREFIX = "db:recent_write:"
+
+_recent_writes = TTLCache(maxsize=10000, ttl=settings.READ_YOUR_WRITES_WINDOW)
+
+
+async def mark_recent_write(subject: str) -> None:
+    """
+    Keep ``subject``'s reads on the primary for READ_YOUR_WRITES_WINDOW
+    seconds, so a replica that has not replayed their change yet cannot
+    serve it back to them.
+    """
+    if not replicas.engines:
+        return
+    _recent_writes.set(subject, True)
+    try:
+        await _get_cache().set(
+            f"{RECENT_WRITE_KEY_PREFIX}{subject}",
+            1,
+            ttl=settings.READ_YOUR_WRITES_WINDOW,
+        )
+    except Exception as e:
+        logger.warning(f"Recent write marker unavailable: {e}")
+
+
+async def wrote_recently(subject: str) -> bool:
+    if _recent_writes.get(subject):
+        return True
+    try:
+        return await _get_cache().exists(f"{RECENT_WRITE_KEY_PREFIX}{subject}")
+    except Exception as e:
+        # Without the marker store the primary is the only safe choice
+        logger.warning(f"Recent write marker unavailable: {e}")
+        return True
+
+
+def _request_subject(request: Request) -> Optional[str]:
+    if (token := get_token_from_cookies(request, ACCESS_TOKEN_NAME)) and (
+        payload := verify_access_token(token)
+    ):
+        return payload.get("sub")
+    return None
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -35,4 +298,30 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only work. Served by a replica unless none is within
+    the lag limit or the requesting user wrote within
+    READ_YOUR_WRITES_WINDOW seconds; then the primary serves it.
+    """
+    replica = replicas.pick()
+    if replica is not None:
+        subject = _request_subject(request)
+        if subject and await wrote_recently(subject):
+            metrics.counter("db_replica.sticky_reads").inc()
+            replica = None
+    elif replicas.engines:
+        metrics.counter("db_replica.primary_fallbacks").inc()
+
+    if replica is None:
+        async with async_session() as session:
+            yield session
+        return
+
+    metrics.counter("db_replica.reads").inc()
+    async with replica_session(bind=replica) as session:
+        yield session
+
+
 DbSession = Annotated[AsyncSession, Depends(get_db)]
+ReadDbSession = Annotated[AsyncSession, Depends(get_read_db)]
@@ -4,23 +4,25 @@ from fastapi import Depends, Request
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.features.auth.schema import UserPrincipal
 from app.features.auth.service import get_current_user, get_current_user_from_cookie
-from app.models import User
-from app.utils.database import get_db
+from app.utils.database import get_db, get_read_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token", auto_error=False)
 
 
 async def get_current_user_dependency(
     request: Request,
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     token: Annotated[Optional[str], Depends(oauth2_scheme)] = None,
-) -> User:
+) -> UserPrincipal:
     if token:
         return await get_current_user(token, db)
     return await get_current_user_from_cookie(request, db)
 
 
 # First Check on the Basis of Token and then on the Basis of Cookies
-CurrentUser = Annotated[User, Depends(get_current_user_dependency)]
+CurrentUser = Annotated[UserPrincipal, Depends(get_current_user_dependency)]
 DbSession = Annotated[AsyncSession, Depends(get_db)]
+# Replica-backed session for routes that only read
+ReadDbSession = Annotated[AsyncSession, Depends(get_read_db)]
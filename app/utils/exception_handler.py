@@ -53,4 +53,8 @@ async def pydantic_validation_exception_handler(request: Request, exc: Validatio
 
 async def http_exception_handler(request: Request, exc: HTTPException):
     response_data = error_response(error_message=str(exc.detail))
-    return JSONResponse(status_code=exc.status_code, content=response_data)
+    return JSONResponse(
+        status_code=exc.status_code,
+        content=response_data,
+        headers=getattr(exc, "headers", None),
+    )
@@ -2,7 +2,13 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from app.services.jobs import scheduler
+from app.features.auth.audit import login_attempt_recorder
+from app.features.auth.revocation import revoked_tokens
+from app.services.email import email_dispatcher, email_service
+from app.services.email.templates import email_templates
+from app.services.jobs import scheduler, scheduler_leader
+from app.utils.database import replicas
+from app.utils.password_hasher import password_hasher
 
 from .logging import logging
 
@@ -16,12 +22,26 @@ async def lifespan_handler(app: FastAPI):
     """
     try:
         logger.info("Application startup initiated (via lifespan).")
-        scheduler.start()
+        # Paused until this process is elected to run the jobs
+        scheduler.start(paused=True)
+        scheduler_leader.start()
         logger.info("Scheduler started successfully.")
+        await email_templates.warm()
+        email_dispatcher.start()
+        login_attempt_recorder.start()
+        revoked_tokens.start()
+        replicas.start()
         yield
         logger.info("Application shutdown initiated (via lifespan).")
+        await scheduler_leader.stop()
         scheduler.shutdown()
         logger.info("Scheduler shut down successfully.")
+        password_hasher.shutdown()
+        await email_dispatcher.stop()
+        await email_service.close()
+        await login_attempt_recorder.stop()
+        await revoked_tokens.stop()
+        await replicas.stop()
     except Exception as e:
         logger.error(f"Lifespan handler error: {e}")
         raise
@@ -1,53 +1,258 @@
+import base64
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
 from functools import wraps
-from typing import Callable, Generic, List, Type, TypeVar
+from typing import Any, Callable, Generic, List, Optional, Sequence, Type, TypeVar
 
+from fastapi import HTTPException, status
 from pydantic import BaseModel, Field
+from sqlalchemy import Select, and_, func, or_, select, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement, UnaryExpression
 
 T = TypeVar("T")
 
 
+class CountMode(str, Enum):
+    exact = "exact"  # SELECT count(*) over the filtered query
+    estimated = "estimated"  # planner row estimate, no table scan
+    none = "none"  # skip counting altogether
+
+
 class PaginationResponseSchema(BaseModel, Generic[T]):
     items: List[T] = Field(..., description="List of items in the current page")
-    total_items: int = Field(..., description="Total number of items across all pages")
-    total_pages: int = Field(..., description="Total number of pages available")
+    total_items: Optional[int] = Field(
+        ..., description="Total number of items across all pages (null if not counted)"
+    )
+    total_pages: Optional[int] = Field(
+        ..., description="Total number of pages available (null if not counted)"
+    )
     current_page: int = Field(..., description="Current page number")
     page_size: int = Field(..., description="Number of items per page")
     has_next: bool = Field(..., description="Indicates if there is a next page")
     has_previous: bool = Field(..., description="Indicates if there is a previous page")
+    next_cursor: Optional[str] = Field(
+        None, description="Opaque cursor for the next page (keyset pagination only)"
+    )
+
+
+def _sort_key(expression: Any) -> tuple:
+    """
+    Split an ORDER BY expression into (column, descending).
+    """
+    if isinstance(expression, UnaryExpression):
+        if expression.modifier is operators.desc_op:
+            return expression.element, True
+        if expression.modifier is operators.asc_op:
+            return expression.element, False
+    return expression, False
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def _decode_value(column: Any, value: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type in (uuid.UUID, Decimal):
+        return python_type(value)
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        # A cursor whose length does not match the sort keys raises ValueError
+        return [
+            _decode_value(column, value)
+            for column, value in zip(columns, values, strict=True)
+        ]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor",
+        ) from e
+
+
+def _keyset_filter(keys: Sequence[tuple], values: Sequence[Any]):
+    columns = [column for column, _ in keys]
+    directions = {descending for _, descending in keys}
+    if len(directions) == 1:
+        # Row comparison lets Postgres walk a composite index directly
+        if directions.pop():
+            return tuple_(*columns) < tuple_(*values)
+        return tuple_(*columns) > tuple_(*values)
+
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+class _ExplainJSON(Executable, ClauseElement):
+    """
+    ``EXPLAIN (FORMAT JSON)`` of ``stmt``, whose values stay bound parameters.
+    """
+
+    inherit_cache = False
+
+    def __init__(self, stmt: Select):
+        self.stmt = stmt
 
 
-def paginator(schema: Type):
+@compiles(_ExplainJSON)
+def _compile_explain_json(element: _ExplainJSON, compiler, **kw) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.stmt, **kw)}"
+
+
+async def count_rows(
+    db: AsyncSession, stmt: Select, mode: CountMode = CountMode.exact
+) -> Optional[int]:
+    if mode == CountMode.none:
+        return None
+
+    base = stmt.order_by(None).limit(None).offset(None)
+    if mode == CountMode.estimated:
+        raw = (await db.execute(_ExplainJSON(base))).scalar()
+        plan = json.loads(raw) if isinstance(raw, str) else raw
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    count_stmt = select(func.count()).select_from(base.subquery())
+    return (await db.execute(count_stmt)).scalar_one()
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    schema: Type[BaseModel],
+    page: int = 1,
+    page_size: int = 10,
+    cursor: Optional[str] = None,
+    order_by: Optional[Sequence[Any]] = None,
+    count: CountMode = CountMode.exact,
+) -> PaginationResponseSchema:
+    """
+    Paginate a single-entity ``select()``.
+
+    With ``order_by`` (an indexed, unique-together set of sort keys, e.g.
+    ``(User.created_at.desc(), User.id.desc())``) pages are fetched by keyset:
+    ``cursor`` carries the last row's keys, so every page costs the same as
+    the first. Without it, the previous OFFSET behaviour is kept.
+    """
+    page = max(page, 1)
+    total_items = await count_rows(db, stmt, count)
+
+    if order_by:
+        keys = [_sort_key(expression) for expression in order_by]
+        page_stmt = stmt.order_by(None).order_by(*order_by)
+        if cursor:
+            values = decode_cursor(cursor, [column for column, _ in keys])
+            page_stmt = page_stmt.where(_keyset_filter(keys, values))
+    else:
+        page_stmt = stmt.offset((page - 1) * page_size)
+
+    rows = (await db.execute(page_stmt.limit(page_size + 1))).scalars().all()
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+
+    next_cursor = None
+    if order_by and has_next:
+        next_cursor = encode_cursor(
+            [getattr(rows[-1], column.key) for column, _ in keys]
+        )
+
+    return PaginationResponseSchema[schema](
+        items=[schema.model_validate(item) for item in rows],
+        total_items=total_items,
+        total_pages=(
+            (total_items + page_size - 1) // page_size
+            if total_items is not None
+            else None
+        ),
+        current_page=page,
+        page_size=page_size,
+        has_next=has_next,
+        has_previous=bool(cursor) if order_by else page > 1,
+        next_cursor=next_cursor,
+    )
+
+
+def paginator(
+    schema: Type,
+    order_by: Optional[Sequence[Any]] = None,
+    count: CountMode = CountMode.exact,
+):
+    """
+    Decorate an async service that returns a ``select()``; the service must
+    take an ``AsyncSession`` plus ``page``/``page_size`` (and ``cursor`` for
+    keyset pagination) arguments.
+    """
+
     def decorator(func: Callable):
+        import inspect
+
+        params = list(inspect.signature(func).parameters)
+
+        def _argument(name: str, args: tuple, kwargs: dict, default: Any) -> Any:
+            if name in kwargs:
+                return kwargs[name]
+            if name in params and len(args) > params.index(name):
+                return args[params.index(name)]
+            return default
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            page = kwargs.get("page")
-            page_size = kwargs.get("page_size")
-            if page is None or page_size is None:
-                import inspect
-
-                sig = inspect.signature(func)
-                params = list(sig.parameters)
-                try:
-                    page_idx = params.index("page")
-                    page_size_idx = params.index("page_size")
-                    page = args[page_idx] if len(args) > page_idx else 1
-                    page_size = args[page_size_idx] if len(args) > page_size_idx else 10
-                except ValueError:
-                    page = page or 1
-                    page_size = page_size or 10
-            query = await func(*args, **kwargs)
-
-            total_items = query.count()
-            items = query.offset((page - 1) * page_size).limit(page_size).all()
-
-            return PaginationResponseSchema[schema](
-                items=[schema.model_validate(item) for item in items],
-                total_items=total_items,
-                total_pages=(total_items + page_size - 1) // page_size,
-                current_page=page,
+            page = _argument("page", args, kwargs, None) or 1
+            page_size = _argument("page_size", args, kwargs, None) or 10
+            cursor = _argument("cursor", args, kwargs, None)
+            db = next(
+                (
+                    value
+                    for value in (*args, *kwargs.values())
+                    if isinstance(value, AsyncSession)
+                ),
+                None,
+            )
+            if db is None:
+                raise TypeError(f"{func.__name__} must receive an AsyncSession")
+
+            stmt = await func(*args, **kwargs)
+            return await paginate(
+                db,
+                stmt,
+                schema,
+                page=page,
                 page_size=page_size,
-                has_next=page * page_size < total_items,
-                has_previous=page > 1,
+                cursor=cursor,
+                order_by=order_by,
+                count=count,
             )
 
         return wrapper
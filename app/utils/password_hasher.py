@@ -0,0 +1,148 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from enum import IntEnum
+from typing import Any, Callable, List, Optional
+
+from fastapi import HTTPException, status
+
+from app.utils.config import settings
+from app.utils.metrics import metrics
+from app.utils.security import hash_password, verify_password
+
+from .logging import logging
+
+logger = logging.getLogger(__name__)
+
+
+class HashPriority(IntEnum):
+    # Lower value is served first
+    LOGIN = 0
+    DEFAULT = 1
+    REGISTRATION = 2
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded worker pool so the
+    event loop never blocks on it.
+
+    At most ``max_concurrency`` jobs run at once; further callers wait in a
+    priority queue (logins before registrations) of at most ``max_queue``
+    entries, beyond which requests are rejected with 503.
+    """
+
+    def __init__(
+        self,
+        executor_type: str = "thread",
+        workers: int = 0,
+        max_concurrency: int = 0,
+        max_queue: int = 100,
+    ):
+        self.executor_type = executor_type
+        self.workers = workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or self.workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._active = 0
+        self._waiters: List[list] = []
+        self._sequence = itertools.count()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hasher"
+                )
+            logger.info(
+                f"Password hasher started with {self.workers} {self.executor_type} workers."
+            )
+        return self._executor
+
+    async def _acquire(self, priority: HashPriority) -> None:
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            metrics.counter("password_hash.rejected").inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = [int(priority), next(self._sequence), waiter]
+        heapq.heappush(self._waiters, entry)
+        metrics.gauge("password_hash.queue_depth").set(len(self._waiters))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before cancellation
+                self._release()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+        finally:
+            metrics.gauge("password_hash.queue_depth").set(len(self._waiters))
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                # Hand the slot straight to the next waiter
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    async def _run(self, priority: HashPriority, func: Callable, *args) -> Any:
+        queued_at = time.perf_counter()
+        await self._acquire(priority)
+        started_at = time.perf_counter()
+        metrics.histogram("password_hash.queue_wait_ms").observe(
+            (started_at - queued_at) * 1000
+        )
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            metrics.histogram("password_hash.hash_time_ms").observe(
+                (time.perf_counter() - started_at) * 1000
+            )
+            self._release()
+
+    async def hash(
+        self, password: str, priority: HashPriority = HashPriority.DEFAULT
+    ) -> str:
+        return await self._run(priority, hash_password, password)
+
+    async def verify(
+        self,
+        plain_password: str,
+        hashed_password: str,
+        priority: HashPriority = HashPriority.DEFAULT,
+    ) -> bool:
+        return await self._run(
+            priority, verify_password, plain_password, hashed_password
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor_type=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_concurrency=settings.PASSWORD_HASH_MAX_CONCURRENCY,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
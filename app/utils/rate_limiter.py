@@ -1,4 +1,17 @@
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-limiter = Limiter(key_func=get_remote_address)
+from .config import settings
+
+# Counters live in Redis so a limit holds across all workers and pods. The
+# limits library applies each hit atomically with a Lua script (one round
+# trip); if Redis becomes unreachable, checks fall back to per-process memory
+# until it recovers.
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI,
+    strategy=settings.RATE_LIMIT_STRATEGY,
+    in_memory_fallback_enabled=True,
+    key_prefix="ratelimit",
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
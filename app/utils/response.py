@@ -1,6 +1,9 @@
 from typing import Any, Dict, Optional
 
+from fastapi import Response, status
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from pydantic_core import to_json
 
 
 class StandardResponse(BaseModel):
@@ -19,6 +22,40 @@ def success_response(
     return {"data": data, "is_success": True, "error": None, "meta_data": meta_data}
 
 
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered by pydantic-core: models, datetimes and UUIDs nested
+    anywhere in the content are serialized straight to bytes, without a
+    ``jsonable_encoder`` pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def fast_success_response(
+    data: Any = None,
+    meta_data: Optional[Dict[str, Any]] = None,
+    status_code: int = status.HTTP_200_OK,
+    response: Optional[Response] = None,
+) -> FastJSONResponse:
+    """
+    ``success_response`` already rendered to bytes. Returning a Response makes
+    FastAPI skip re-validating the envelope against ``response_model``, which
+    routes keep declaring for the OpenAPI schema. Since the route's
+    ``status_code`` and the injected ``response`` are then ignored, pass the
+    status explicitly and hand over ``response`` to keep headers such as
+    cookies set on it.
+    """
+    fast_response = FastJSONResponse(
+        content=success_response(data=data, meta_data=meta_data),
+        status_code=status_code,
+    )
+    if response is not None:
+        fast_response.headers.raw.extend(response.headers.raw)
+    return fast_response
+
+
 def error_response(
     error_message: str,
     error_details: Optional[Dict[str, Any]] = None,
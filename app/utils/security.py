@@ -1,27 +1,44 @@
 import hashlib
+import time
+import uuid
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Dict, Optional
 
 from fastapi import Request, Response
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 
+from app.utils.cache import TTLCache
 from app.utils.config import settings
+from app.utils.metrics import metrics
 
 from .constants import ACCESS_TOKEN_NAME
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# python-jose and passlib are imported on first use rather than with this
+# module, which nearly everything imports; see app.commands.import_budget
+@lru_cache(maxsize=None)
+def _pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+# Decoded claims of recently verified tokens, keyed by the token's SHA-256
+# digest and kept until the token's own ``exp``.
+_claims_cache = TTLCache(maxsize=settings.JWT_CLAIMS_CACHE_MAXSIZE, ttl=0)
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
@@ -30,11 +47,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
 
-    to_encode.update({"exp": expire, "token_type": "access"})
+    to_encode.update({"exp": expire, "token_type": "access", "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
@@ -43,25 +62,41 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
             days=settings.REFRESH_TOKEN_EXPIRE_DAYS
         )
 
-    to_encode.update({"exp": expire, "token_type": "refresh"})
+    # jti keeps tokens issued within the same second (e.g. on rotation) unique
+    to_encode.update({"exp": expire, "token_type": "refresh", "jti": uuid.uuid4().hex})
 
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-def verify_token(token: str) -> Optional[Dict]:
+def _decode_token(token: str) -> Optional[Dict]:
+    from jose import JWTError, jwt
+
+    # jose validates the signature and ``exp`` itself
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        if "exp" in payload and datetime.fromtimestamp(
-            payload["exp"], timezone.utc
-        ) < datetime.now(timezone.utc):
-            return None
-        return payload
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except JWTError:
         return None
 
 
+def verify_token(token: str) -> Optional[Dict]:
+    """
+    Decode and validate ``token``. The returned claims may be shared with
+    other callers through the cache and must not be mutated.
+    """
+    cache_key = hashlib.sha256(token.encode()).digest()
+    if (payload := _claims_cache.get(cache_key)) is not None:
+        metrics.counter("jwt_claims_cache.hits").inc()
+        return payload
+
+    metrics.counter("jwt_claims_cache.misses").inc()
+    payload = _decode_token(token)
+    if payload and "exp" in payload:
+        remaining = payload["exp"] - time.time()
+        if remaining > 0:
+            _claims_cache.set(cache_key, payload, ttl=remaining)
+    return payload
+
+
 def verify_access_token(token: str) -> Optional[Dict]:
     payload = verify_token(token)
     if not payload or payload.get("token_type", "access") != "access":
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Client-side CPU cost per execution of the hot auth queries.
+
+Usage: python scripts/benchmarks/auth_queries.py [--queries N]
+
+Needs the database from .env. "rebuilt" constructs the statement on every
+call, as the auth service used to; "prebuilt" executes the statements from
+``app.features.auth.queries`` with bound parameters. Each runs with the
+asyncpg prepared-statement cache enabled and disabled (the PgBouncer mode).
+Lookups target rows that do not exist, so the figures are dominated by
+SQLAlchemy and asyncpg rather than row processing.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+
+from app.features.auth.queries import (  # noqa: E402
+    REFRESH_TOKEN_BY_HASH,
+    USER_BY_EMAIL,
+    USER_BY_ID,
+)
+from app.models import RefreshToken, User  # noqa: E402
+from app.utils.config import settings  # noqa: E402
+
+EMAIL = "benchmark@example.com"
+USER_ID = uuid.uuid4()
+TOKEN_HASH = hashlib.sha256(b"benchmark").hexdigest()
+
+QUERIES = {
+    "user by email": (
+        lambda: select(User).filter(User.email == EMAIL),
+        lambda: (USER_BY_EMAIL, {"email": EMAIL}),
+    ),
+    "user by id": (
+        lambda: select(User).filter(User.id == USER_ID),
+        lambda: (USER_BY_ID, {"user_id": USER_ID}),
+    ),
+    "refresh token": (
+        lambda: select(RefreshToken).filter(RefreshToken.token_hash == TOKEN_HASH),
+        lambda: (REFRESH_TOKEN_BY_HASH, {"token_hash": TOKEN_HASH}),
+    ),
+}
+
+
+async def run(execute, queries: int) -> float:
+    for _ in range(100):
+        (await execute()).scalar_one_or_none()
+    start = time.process_time()
+    for _ in range(queries):
+        (await execute()).scalar_one_or_none()
+    return (time.process_time() - start) / queries * 1_000_000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=3000)
+    args = parser.parse_args()
+
+    engines = {
+        "cache": create_async_engine(
+            settings.DATABASE_URL,
+            connect_args={
+                "prepared_statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE
+            },
+        ),
+        "no cache": create_async_engine(
+            settings.DATABASE_URL,
+            connect_args={
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            },
+        ),
+    }
+
+    print(
+        f"{'query':<14} {'prepared':<9} {'rebuilt':>12} {'prebuilt':>12} {'speedup':>8}"
+    )
+    for label, engine in engines.items():
+        async with AsyncSession(engine) as db:
+            for name, (rebuilt, prebuilt) in QUERIES.items():
+                rebuilt_us = await run(
+                    lambda rebuilt=rebuilt: db.execute(rebuilt()), args.queries
+                )
+                prebuilt_us = await run(
+                    lambda prebuilt=prebuilt: db.execute(*prebuilt()), args.queries
+                )
+                print(
+                    f"{name:<14} {label:<9} {rebuilt_us:9.1f} us {prebuilt_us:9.1f} us "
+                    f"{rebuilt_us / prebuilt_us:7.2f}x"
+                )
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
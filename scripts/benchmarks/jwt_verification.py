@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Per-request CPU cost of access-token verification with and without the
+decoded-claims cache.
+
+Usage: python scripts/benchmarks/jwt_verification.py [--requests N] [--tokens N]
+
+Requests draw tokens from a fixed set of live sessions, so ``requests/tokens``
+is the average number of times each token is reused (a browser session calling
+the API every few seconds for a 30-minute token easily reuses it hundreds of
+times).
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+from app.utils import security  # noqa: E402
+
+
+def run(label: str, verify, tokens: list, requests: int) -> float:
+    rng = random.Random(42)
+    sample = [rng.choice(tokens) for _ in range(requests)]
+    start = time.process_time()
+    for token in sample:
+        assert verify(token)
+    elapsed = time.process_time() - start
+    per_request_us = elapsed / requests * 1_000_000
+    print(f"{label:<28} {per_request_us:8.2f} us/request")
+    return per_request_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--tokens", type=int, default=500)
+    args = parser.parse_args()
+
+    tokens = [
+        security.create_access_token({"sub": f"user{i}@example.com"})
+        for i in range(args.tokens)
+    ]
+    print(
+        f"{args.requests} requests over {args.tokens} tokens "
+        f"(reuse ratio {args.requests / args.tokens:.0f}x)\n"
+    )
+
+    uncached = run(
+        "jose decode (no cache)", security._decode_token, tokens, args.requests
+    )
+    security._claims_cache.clear()
+    cached = run(
+        "verify_access_token (cache)",
+        security.verify_access_token,
+        tokens,
+        args.requests,
+    )
+
+    print(
+        f"\nCPU saved per request: {uncached - cached:.2f} us ({uncached / cached:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Per-response CPU cost of building the StandardResponse envelope.
+
+Usage: python scripts/benchmarks/response_serialization.py [--requests N]
+
+"standard" is what FastAPI does when a route returns ``success_response(...)``
+with ``response_model=StandardResponse``: validate the envelope, run
+``jsonable_encoder`` over it and render with the stdlib ``json`` module.
+"fast" is ``fast_success_response``, which renders straight to bytes with
+pydantic-core and lets FastAPI skip the response model.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+from app.features.auth.schema import (  # noqa: E402
+    RefreshTokenResponseSchema,
+    UserPrincipal,
+    UserResponseSchema,
+)
+from app.utils.response import (  # noqa: E402
+    StandardResponse,
+    fast_success_response,
+    success_response,
+)
+from app.utils.security import create_access_token  # noqa: E402
+
+RESPONSE_FIELD = create_model_field(
+    "Response_benchmark", StandardResponse, mode="serialization"
+)
+
+
+def payloads() -> dict:
+    principal = UserPrincipal(
+        id=uuid.uuid4(),
+        first_name="Ada",
+        last_name="Lovelace",
+        email="ada@example.com",
+        is_active=True,
+        is_user_confirmed=True,
+        twofa_enabled=False,
+        created_at=datetime.now(timezone.utc),
+        user_data={"message": "Welcome", "preferences": {"theme": "dark"}},
+    )
+    return {
+        "/api/health": {
+            "data": {"status": "ok", "message": "API is running"},
+            "meta_data": {"version": "1.0.0", "timestamp": "2024-07-24T10:00:00Z"},
+        },
+        "/auth/me": {"data": UserResponseSchema.model_validate(principal)},
+        "/auth/refresh": {
+            "data": RefreshTokenResponseSchema(
+                access_token=create_access_token({"sub": principal.email})
+            )
+        },
+    }
+
+
+async def standard(payload: dict) -> bytes:
+    content = await serialize_response(
+        field=RESPONSE_FIELD, response_content=success_response(**payload)
+    )
+    return JSONResponse(content).body
+
+
+async def fast(payload: dict) -> bytes:
+    return fast_success_response(**payload).body
+
+
+async def run(render, payload: dict, requests: int) -> float:
+    start = time.process_time()
+    for _ in range(requests):
+        await render(payload)
+    return (time.process_time() - start) / requests * 1_000_000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<16} {'standard':>12} {'fast':>12} {'speedup':>8}")
+    for endpoint, payload in payloads().items():
+        assert json.loads(await standard(payload)) == json.loads(await fast(payload))
+        slow_us = await run(standard, payload, args.requests)
+        fast_us = await run(fast, payload, args.requests)
+        print(
+            f"{endpoint:<16} {slow_us:9.2f} us {fast_us:9.2f} us "
+            f"{slow_us / fast_us:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())